@@ -2,7 +2,7 @@
 Agents package for Academic Research Paper Generator
 """
 
-from .data_models import SourceMetadata, ProcessedContent, FinalAnswer
+from .data_models import SourceMetadata, ProcessedContent, FinalAnswer, SearchContext
 from .config import Config
 from .base_agent import BaseAgent
 from .query_analyzer_agent import QueryAnalyzerAgent
@@ -19,6 +19,7 @@ __all__ = [
     'SourceMetadata',
     'ProcessedContent',
     'FinalAnswer',
+    'SearchContext',
     'Config',
     'BaseAgent',
     'QueryAnalyzerAgent',
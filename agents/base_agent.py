@@ -7,10 +7,22 @@ from typing import Optional
 # from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from langchain_core.callbacks import StreamingStdOutCallbackHandler
+from langchain_core.rate_limiters import InMemoryRateLimiter
 
 from .config import Config
 
 
+# Token bucket shared by every agent's LLM so the provider rate limit is respected
+# without idling workers between calls when under the limit. The bucket lives in
+# this process only: with WEB_CONCURRENCY set, each worker gets an equal share of
+# the configured rate and burst; otherwise the limit applies per process
+LLM_RATE_LIMITER = InMemoryRateLimiter(
+    requests_per_second=Config.LLM_REQUESTS_PER_SECOND / Config.WEB_WORKERS,
+    check_every_n_seconds=0.05,
+    max_bucket_size=max(1, Config.LLM_RATE_LIMIT_BURST // Config.WEB_WORKERS)
+)
+
+
 class BaseAgent:
     """
     Base class for all specialized agents in the AI Deep Search system.
@@ -47,6 +59,7 @@ class BaseAgent:
         - Temperature of 0.3 (for more deterministic outputs)
         - Maximum output tokens of 16000
         - Streaming enabled with stdout callback
+        - The shared LLM_RATE_LIMITER token bucket
         
         Returns:
             ChatOpenAI: Configured language model instance
@@ -68,7 +81,8 @@ class BaseAgent:
             temperature=0.3,
             max_tokens=16000,  # Significantly increased to prevent truncation (GPT-4o supports up to 16k output)
             streaming=True,
-            callbacks=[StreamingStdOutCallbackHandler()]
+            callbacks=[StreamingStdOutCallbackHandler()],
+            rate_limiter=LLM_RATE_LIMITER
         )
 
     async def process(self, *args, **kwargs):
@@ -3,6 +3,7 @@ Configuration for Academic Research Paper Generator
 """
 
 import os
+import tempfile
 
 
 class Config:
@@ -52,6 +53,69 @@ class Config:
     MAX_CONCURRENT_LLM_CALLS = 10  # Maximum concurrent LLM API calls
     """int: Maximum number of concurrent LLM API calls for summarization/verification"""
 
+    VERIFICATION_BATCH_SIZE = 10  # Claims verified per LLM call
+    """int: Number of claims packed into a single verification prompt"""
+    
+    VERIFICATION_BASE_TOKENS = 1024  # Fixed reasoning headroom per verification call
+    """int: Output tokens granted to every verification call regardless of batch size"""
+    
+    VERIFICATION_TOKENS_PER_CLAIM = 512  # Reasoning plus verdict line for each claim
+    """int: Output tokens added to a verification call's cap for each claim in the batch"""
+    
+    VERIFICATION_SOURCE_CHARS = 1000  # Source excerpt length per verified claim
+    """int: Characters of source content each claim is verified against"""
+    
+    VERIFICATION_CACHE_SIZE = 5000  # Verdicts kept in the in-memory LRU
+    """int: Maximum number of (claim, source) verdicts cached by the verification agent"""
+    
+    LLM_REQUESTS_PER_SECOND = float(os.getenv("LLM_REQUESTS_PER_SECOND", "20"))  # Token-bucket refill rate for the whole deployment
+    """float: Sustained LLM request rate allowed across all server worker processes"""
+    
+    LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "10"))  # Token-bucket capacity (requests that may start at once)
+    """int: Maximum number of LLM requests all worker processes may start in a single burst"""
+    
+    WEB_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))  # Only an explicit worker count splits the limit
+    """int: Number of server worker processes the LLM rate limit is split across (WEB_CONCURRENCY, default 1)"""
+    
+    SUMMARIZER_MAX_INPUT_CHARS = 6000  # Input budget per source sent to the summarizer
+    """int: Maximum characters of source content sent to the summarizer LLM (head and tail are kept)"""
+
+    SUMMARIZER_MIN_CHARS = 400  # Shorter content is used verbatim instead of summarized
+    """int: Content shorter than this many characters skips the LLM and is passed through as its own summary"""
+    
+    ENABLE_SUMMARY_CACHE = os.getenv("ENABLE_SUMMARY_CACHE", "true").lower() == "true"
+    """bool: Whether to persist source summaries to SQLite and reuse them across research runs"""
+    
+    SUMMARY_CACHE_PATH = os.getenv(
+        "SUMMARY_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), "omnivionai_summaries.sqlite3")
+    )
+    """str: Filesystem path of the SQLite summary cache"""
+    
+    SUMMARY_CACHE_TTL = 7 * 24 * 3600  # 7 days
+    """int: Seconds a cached summary stays valid"""
+    
+    SUMMARY_MEMORY_CACHE_SIZE = 2000  # Hot summaries kept in process memory
+    """int: Maximum number of summaries held in the in-memory LRU in front of the SQLite cache"""
+
+    ENABLE_RESULT_CACHE = os.getenv("ENABLE_RESULT_CACHE", "true").lower() == "true"
+    """bool: Whether the orchestrator reuses recent results for repeated queries"""
+    
+    RESULT_CACHE_TTL = 3600  # 1 hour
+    """int: Seconds a cached research result stays valid"""
+    
+    RESULT_CACHE_SIZE = 256  # Recent results kept in process memory
+    """int: Maximum number of research results held in the orchestrator's LRU cache"""
+    
+    RESULT_CACHE_STALE_TTL = 86400  # 24 hours
+    """int: Seconds an expired result may still be served when a fresh search fails"""
+    
+    QUERY_ANALYSIS_CACHE_TTL = 3600  # 1 hour
+    """int: Seconds a cached query analysis (search questions) stays valid"""
+    
+    QUERY_ANALYSIS_CACHE_SIZE = 1024  # Recent analyses kept in process memory
+    """int: Maximum number of query analyses held in the query analyzer's LRU cache"""
+
     # Domain diversity limits - increased for more sources
     MAX_SOURCES_PER_DOMAIN_PER_TERM = 2  # Allow more sources per domain per term
     """int: Maximum sources allowed from same domain for a single search term"""
@@ -2,12 +2,13 @@
 Data Models for Academic Research Paper Generator
 """
 
-from typing import List
+from typing import Any, Callable, Dict, List, Optional
 from dataclasses import dataclass, field
 from datetime import datetime
+from urllib.parse import urlparse
 
 
-@dataclass
+@dataclass(slots=True)
 class SourceMetadata:
     """
     Comprehensive metadata for tracking and citing research sources.
@@ -28,7 +29,7 @@ class SourceMetadata:
         trust_score (int): Numeric trust score (0-100) based on domain reputation
         is_trusted (bool): Whether the source is from a trusted domain
         trust_category (str): Category of trust (e.g., "Academic Source", "Verified Media")
-        domain (str): The domain name of the source
+        domain (str): The domain name of the source (derived from the URL when not supplied)
         images (List[dict]): List of images extracted from the source with url, alt text, and context
     """
     url: str
@@ -46,8 +47,13 @@ class SourceMetadata:
     domain: str = ""
     images: List[dict] = field(default_factory=list)
 
+    def __post_init__(self):
+        # Resolve the domain once so renderers never need to re-parse the URL
+        if not self.domain:
+            self.domain = urlparse(self.url).netloc.lower()
 
-@dataclass
+
+@dataclass(slots=True)
 class ProcessedContent:
     """
     Processed and summarized content with full citation metadata.
@@ -65,7 +71,7 @@ class ProcessedContent:
     confidence_score: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class FinalAnswer:
     """
     Complete research result with answer, citations, and formatted output.
@@ -84,3 +90,24 @@ class FinalAnswer:
     confidence_score: float = 0.0
     # markdown_content: str = ""  # COMMENTED OUT FOR PERFORMANCE
 
+
+
+@dataclass(slots=True)
+class SearchContext:
+    """
+    Per-search state threaded through a single run of the research pipeline.
+    
+    The orchestrator and its agents are shared by all concurrent searches, so
+    anything that differs between searches lives here instead of on the
+    orchestrator or in the global Config.
+    
+    Attributes:
+        query (str): The research question being answered
+        search_mode (str): Search mode name ("deep", "moderate", "quick", "sla")
+        mode_config (Dict[str, Any]): Settings of the search mode from Config.SEARCH_MODES
+        progress_callback (Optional[Callable]): Async callback receiving progress updates
+    """
+    query: str
+    search_mode: str
+    mode_config: Dict[str, Any]
+    progress_callback: Optional[Callable] = None
@@ -2,8 +2,11 @@
 Image Analyzer Agent for Academic Research Paper Generator
 """
 
-from typing import List, Dict
+import asyncio
+from typing import List, Dict, Optional
+
 from .base_agent import BaseAgent
+from .config import Config
 
 
 class ImageAnalyzerAgent(BaseAgent):
@@ -42,10 +45,11 @@ class ImageAnalyzerAgent(BaseAgent):
         
         print(f"   🖼️  Analyzing {len(images)} images with AI...")
         
-        enhanced_images = []
-        filtered_count = 0
-        
-        for i, img in enumerate(images, 1):
+        # OPTIMIZED: Analyze all images concurrently instead of one LLM call at a time
+        semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_LLM_CALLS)
+
+        async def analyze_image(i: int, img: Dict) -> Optional[Dict]:
+            """Analyze one image; returns None if it is filtered out"""
             try:
                 # Minimal filter: Only skip the most obvious non-content images
                 alt_lower = (img.get('alt', '') + ' ' + img.get('title', '')).lower()
@@ -55,8 +59,7 @@ class ImageAnalyzerAgent(BaseAgent):
                 
                 if any(indicator in alt_lower for indicator in skip_indicators):
                     print(f"   🚫 Skipped image {i}: Icon/tracker")
-                    filtered_count += 1
-                    continue
+                    return None
                 
                 # Build context from existing metadata
                 existing_context = f"""
@@ -87,10 +90,8 @@ RELEVANT: YES/NO
 DESCRIPTION: [short description]
 KEYWORDS: [keyword1, keyword2, keyword3]"""
 
-                from langchain_core.prompts import PromptTemplate
-                prompt = PromptTemplate(input_variables=["text"], template="{text}")
-                chain = prompt | self.llm
-                result = await chain.ainvoke({"text": description_prompt})
+                async with semaphore:
+                    result = await self.llm.ainvoke(description_prompt)
                 
                 response = result.content if hasattr(result, 'content') else str(result)
                 
@@ -113,8 +114,7 @@ KEYWORDS: [keyword1, keyword2, keyword3]"""
                 # Skip if AI determined it's not relevant
                 if not is_relevant or not ai_description:
                     print(f"   🚫 Skipped image {i}: Not relevant to topic")
-                    filtered_count += 1
-                    continue
+                    return None
                 
                 # Create enhanced image object
                 enhanced_img = {
@@ -124,14 +124,18 @@ KEYWORDS: [keyword1, keyword2, keyword3]"""
                     'analyzed': True
                 }
                 
-                enhanced_images.append(enhanced_img)
-                
                 print(f"   ✅ Analyzed image {i}/{len(images)}: {ai_description[:50]}...")
+                return enhanced_img
                 
             except Exception as e:
                 print(f"   ⚠️  Failed to analyze image {i}: {e}")
-                filtered_count += 1
-                continue
+                return None
+        
+        results = await asyncio.gather(*(analyze_image(i, img) for i, img in enumerate(images, 1)))
+
+        # Keep the original image order
+        enhanced_images = [img for img in results if img is not None]
+        filtered_count = len(images) - len(enhanced_images)
         
         print(f"   🎯 Kept {len(enhanced_images)} relevant images, filtered out {filtered_count}")
         return enhanced_images
@@ -5,8 +5,9 @@ Orchestrator for Academic Research Paper Generator
 import asyncio
 import json
 import math
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Literal
+from typing import Dict, List, Literal, Optional, Tuple
 import time
 
 from .query_analyzer_agent import QueryAnalyzerAgent
@@ -17,7 +18,7 @@ from .verification_agent import VerificationAgent
 from .reasoning_agent import ReasoningAgent
 from .source_citer_agent import SourceCiterAgent
 from .image_analyzer_agent import ImageAnalyzerAgent
-from .data_models import FinalAnswer
+from .data_models import FinalAnswer, SearchContext
 from .config import Config
 
 # Type alias for search modes
@@ -49,6 +50,8 @@ class Orchestrator:
         verification_agent (VerificationAgent): Verifies factual claims
         reasoning_agent (ReasoningAgent): Applies logical reasoning to findings
         citer_agent (SourceCiterAgent): Generates citations and research papers
+        result_cache (OrderedDict): LRU of recent results keyed by (normalized query, mode)
+        inflight (Dict): Running pipelines and their waiter counts, keyed like result_cache
     """
 
     def __init__(self):
@@ -61,6 +64,124 @@ class Orchestrator:
         self.reasoning_agent = ReasoningAgent()
         self.citer_agent = SourceCiterAgent()
         self.image_analyzer = ImageAnalyzerAgent()
+        self.result_cache: "OrderedDict[Tuple[str, str], Tuple[float, FinalAnswer]]" = OrderedDict()
+        self.inflight: Dict[Tuple[str, str], List] = {}
+
+    @staticmethod
+    def _result_cache_key(query: str, search_mode: str) -> Tuple[str, str]:
+        """
+        Build the result cache key for a query.
+        
+        Case and whitespace differences are ignored so trivially re-typed queries
+        share one entry.
+        
+        Args:
+            query (str): The research question
+            search_mode (str): Search mode the result was produced with
+            
+        Returns:
+            Tuple[str, str]: Normalized query and search mode
+        """
+        return " ".join(query.lower().split()), search_mode
+
+    def _get_cached_result(self, key: Tuple[str, str], max_age: Optional[float] = None) -> Optional[FinalAnswer]:
+        """
+        Return a cached result for the key if it is at most max_age seconds old.
+        
+        Expired entries are kept for RESULT_CACHE_STALE_TTL seconds so a failed
+        search can still fall back to them; older ones are dropped.
+        
+        Args:
+            key (Tuple[str, str]): Key built by _result_cache_key()
+            max_age (Optional[float]): Maximum age in seconds (default RESULT_CACHE_TTL)
+            
+        Returns:
+            Optional[FinalAnswer]: The cached result, or None
+        """
+        entry = self.result_cache.get(key)
+        if entry is None:
+            return None
+        cached_at, result = entry
+        age = time.time() - cached_at
+        if age > (Config.RESULT_CACHE_TTL if max_age is None else max_age):
+            if age > Config.RESULT_CACHE_STALE_TTL:
+                del self.result_cache[key]
+            return None
+        self.result_cache.move_to_end(key)
+        return result
+
+    def _stale_result_or_raise(self, key: Tuple[str, str], error: Exception) -> FinalAnswer:
+        """
+        Fall back to an expired cached result after a failed search.
+        
+        Validation errors (ValueError) are always re-raised, since they describe
+        the query itself rather than a pipeline failure.
+        
+        Args:
+            key (Tuple[str, str]): Key built by _result_cache_key()
+            error (Exception): The error raised by the pipeline
+            
+        Returns:
+            FinalAnswer: The most recent cached result for the key
+            
+        Raises:
+            Exception: The original error if there is nothing to fall back to
+        """
+        if isinstance(error, ValueError) or not Config.ENABLE_RESULT_CACHE:
+            raise error
+        stale = self._get_cached_result(key, Config.RESULT_CACHE_STALE_TTL)
+        if stale is None:
+            raise error
+        print(f"⚠️ Research failed ({error}); serving the previous result for this query")
+        return stale
+
+    def _cache_result(self, key: Tuple[str, str], result: FinalAnswer) -> None:
+        """Store a result in the LRU result cache, evicting the oldest if full."""
+        self.result_cache[key] = (time.time(), result)
+        self.result_cache.move_to_end(key)
+        while len(self.result_cache) > Config.RESULT_CACHE_SIZE:
+            self.result_cache.popitem(last=False)
+
+    def _start_single_flight(self, key: Tuple[str, str], context: SearchContext) -> List:
+        """
+        Start the pipeline for a search as a task that identical searches can join.
+        
+        Args:
+            key (Tuple[str, str]): Normalized query and search mode
+            context (SearchContext): Settings of the search starting the pipeline
+            
+        Returns:
+            List: The in-flight entry [task, waiter count]
+        """
+        task = asyncio.create_task(self._execute_search(context))
+        entry = self.inflight[key] = [task, 0]
+        task.add_done_callback(
+            lambda _: self.inflight.pop(key, None) if self.inflight.get(key) is entry else None
+        )
+        return entry
+
+    @staticmethod
+    async def _await_single_flight(entry: List) -> FinalAnswer:
+        """
+        Wait for a shared pipeline run.
+        
+        A caller that is cancelled (e.g. its client disconnected) only stops
+        waiting; the pipeline itself is cancelled once no caller waits for it.
+        
+        Args:
+            entry (List): In-flight entry [task, waiter count]
+            
+        Returns:
+            FinalAnswer: Result of the shared pipeline run
+        """
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                task.cancel()
 
     async def search(self, query: str, progress_callback=None, search_mode: SearchMode = "deep") -> FinalAnswer:
         """
@@ -83,57 +204,161 @@ class Orchestrator:
         Raises:
             ValueError: If the query fails validation (e.g., inappropriate content, malicious input)
             Exception: For other errors during the research process
+            
+        Note:
+            OPTIMIZED: Results with citations are cached for RESULT_CACHE_TTL seconds;
+            repeating a query in the same mode returns the cached answer without
+            running the pipeline. Identical searches arriving while one is still
+            running share that run instead of starting their own. If the pipeline
+            fails, an expired result up to RESULT_CACHE_STALE_TTL seconds old is
+            served instead of the error.
         """
 
         print(f"\n🔍 Processing query: {query}")
         print(f"🎯 Search mode: {search_mode.upper()}")
         print("=" * 50)
         
+        # OPTIMIZED: Serve repeated queries from the result cache
+        cache_key = self._result_cache_key(query, search_mode)
+        if Config.ENABLE_RESULT_CACHE:
+            cached = self._get_cached_result(cache_key)
+            if cached is not None:
+                print("⚡ Returning cached result")
+                if progress_callback:
+                    await progress_callback(
+                        "completion",
+                        "completed",
+                        "Research complete! Answer served from recent results.",
+                        100.0,
+                        None,
+                        None,
+                        len(cached.citations)
+                    )
+                return cached
+        
+        # OPTIMIZED: Join an identical search that is already running
+        entry = self.inflight.get(cache_key)
+        if entry is not None:
+            print("🔗 Joining identical search already in progress")
+            if progress_callback:
+                # Count as a waiter while reporting, so the shared run is not
+                # cancelled meanwhile by its other callers going away
+                entry[1] += 1
+                try:
+                    await progress_callback(
+                        "research",
+                        "started",
+                        "An identical search is already running, waiting for its results...",
+                        30.0,
+                        None,
+                        None,
+                        None
+                    )
+                finally:
+                    entry[1] -= 1
+            try:
+                result = await self._await_single_flight(entry)
+            except Exception as e:
+                result = self._stale_result_or_raise(cache_key, e)
+            if progress_callback:
+                await progress_callback(
+                    "completion",
+                    "completed",
+                    "Research complete!",
+                    100.0,
+                    None,
+                    None,
+                    len(result.citations)
+                )
+            return result
+        
         # Apply search mode configuration
         mode_config = Config.SEARCH_MODES.get(search_mode, Config.SEARCH_MODES["deep"])
         print(f"📊 Mode config: {mode_config['description']}")
         print(f"⚙️  Settings: {mode_config['max_results_per_search']} sources, {mode_config['max_research_iterations']} iterations, {mode_config['request_timeout']}s timeout")
         
-        # Store mode config for access in _execute_search
-        self._current_mode_config = mode_config
-        
-        # Temporarily override config for this search
-        original_max_results = Config.MAX_RESULTS_PER_SEARCH
-        original_max_content = Config.MAX_CONTENT_LENGTH
-        original_max_iterations = Config.MAX_RESEARCH_ITERATIONS
-        original_enable_iterative = Config.ENABLE_ITERATIVE_RESEARCH
-        original_rate_limit = Config.RATE_LIMIT_DELAY
-        original_request_timeout = Config.REQUEST_TIMEOUT
-        original_max_retries = Config.MAX_RETRIES
-        
-        Config.MAX_RESULTS_PER_SEARCH = mode_config["max_results_per_search"]
-        Config.MAX_CONTENT_LENGTH = mode_config["max_content_length"]
-        Config.MAX_RESEARCH_ITERATIONS = mode_config["max_research_iterations"]
-        Config.ENABLE_ITERATIVE_RESEARCH = mode_config["enable_iterative_research"]
-        Config.RATE_LIMIT_DELAY = mode_config["rate_limit_delay"]
-        Config.REQUEST_TIMEOUT = mode_config["request_timeout"]
-        Config.MAX_RETRIES = mode_config["max_retries"]
+        # Per-search settings travel with the call instead of being written to the
+        # shared orchestrator or the global Config, so concurrent searches in
+        # different modes cannot see each other's limits
+        context = SearchContext(
+            query=query,
+            search_mode=search_mode,
+            mode_config=mode_config,
+            progress_callback=progress_callback
+        )
         
         try:
-            return await self._execute_search(query, progress_callback)
-        finally:
-            # Restore original config
-            Config.MAX_RESULTS_PER_SEARCH = original_max_results
-            Config.MAX_CONTENT_LENGTH = original_max_content
-            Config.MAX_RESEARCH_ITERATIONS = original_max_iterations
-            Config.ENABLE_ITERATIVE_RESEARCH = original_enable_iterative
-            Config.RATE_LIMIT_DELAY = original_rate_limit
-            Config.REQUEST_TIMEOUT = original_request_timeout
-            Config.MAX_RETRIES = original_max_retries
-            self._current_mode_config = None
+            result = await self._await_single_flight(self._start_single_flight(cache_key, context))
+        except Exception as e:
+            # OPTIMIZED: Serve the last good answer if the pipeline fails
+            return self._stale_result_or_raise(cache_key, e)
+        if Config.ENABLE_RESULT_CACHE and result.citations:
+            self._cache_result(cache_key, result)
+        return result
     
-    async def _execute_search(self, query: str, progress_callback=None) -> FinalAnswer:
+    async def _analyze_source_images(self, sources, query: str, main_topic: str) -> Optional[int]:
         """
-        Internal method to execute the search pipeline with current config.
+        Analyze the images found in sources and attach the analyzed versions.
         
         Args:
-            query (str): The research question or topic to investigate
-            progress_callback (Optional[Callable]): Optional async callback function for progress updates
+            sources (List[SourceMetadata]): Researched sources (images updated in place)
+            query (str): The research question
+            main_topic (str): Main topic from query analysis
+            
+        Returns:
+            Optional[int]: Number of images kept after analysis, or None if the
+                           sources contained no images
+        """
+        # Collect all images from sources
+        all_images = []
+        for source in sources:
+            if hasattr(source, 'images') and source.images:
+                all_images.extend(source.images)
+        
+        if not all_images:
+            print(f"   ℹ️  No images found to analyze")
+            return None
+
+        # Remove duplicates based on URL
+        unique_images = []
+        seen_urls = set()
+        for img in all_images:
+            if img.get('url') and img['url'] not in seen_urls:
+                seen_urls.add(img['url'])
+                unique_images.append(img)
+        
+        # Limit to max 15 images for AI analysis
+        max_analyze = 15
+        if len(unique_images) > max_analyze:
+            print(f"   Found {len(unique_images)} unique images, limiting to {max_analyze} for AI analysis")
+            unique_images = unique_images[:max_analyze]
+        else:
+            print(f"   Found {len(unique_images)} unique images to analyze")
+        
+        # Analyze images with AI
+        analyzed_images = await self.image_analyzer.analyze_images(unique_images, query, main_topic)
+        
+        # Update sources with analyzed images
+        for source in sources:
+            if hasattr(source, 'images') and source.images:
+                # Replace with analyzed versions
+                enhanced_imgs = []
+                for img in source.images:
+                    # Find the analyzed version
+                    analyzed = next((ai for ai in analyzed_images if ai.get('url') == img.get('url')), None)
+                    enhanced_imgs.append(analyzed if analyzed else img)
+                source.images = enhanced_imgs
+        
+        print(f"   ✅ Image analysis complete")
+        return len(analyzed_images)
+
+    async def _execute_search(self, context: SearchContext) -> FinalAnswer:
+        """
+        Internal method to execute the search pipeline for one search.
+        
+        Args:
+            context (SearchContext): Query, search mode settings and progress callback
+                of this search
                 
         Returns:
             FinalAnswer: Complete research result with answer, citations, and markdown content
@@ -141,9 +366,11 @@ class Orchestrator:
         
         start_time = time.time()
         step_times = {}
+        query = context.query
+        progress_callback = context.progress_callback
         
         # Get mode config for conditional step execution
-        mode_config = getattr(self, '_current_mode_config', Config.SEARCH_MODES["deep"])
+        mode_config = context.mode_config
         skip_validation = mode_config.get("skip_validation", False)
         skip_verification = mode_config.get("skip_verification", False)
         skip_reasoning = mode_config.get("skip_reasoning", False)
@@ -216,15 +443,16 @@ class Orchestrator:
         step_times["query_analysis"] = time.time() - step_start
 
         # Step 2: Research (Iterative or Standard)
-        if Config.ENABLE_ITERATIVE_RESEARCH:
+        if mode_config["enable_iterative_research"]:
             print("\n🔬 Starting iterative research...")
             step_start = time.time()
             await emit_progress("research", "started", "Gathering sources from the web...", 30.0)
             
             sources = await self.research_agent.process_iterative(
                 query_analysis, 
-                max_iterations=Config.MAX_RESEARCH_ITERATIONS,
-                progress_callback=emit_progress
+                max_iterations=mode_config["max_research_iterations"],
+                progress_callback=emit_progress,
+                mode_config=mode_config
             )
             print(f"   🎯 Completed iterative research: {len(sources)} total sources")
             
@@ -250,7 +478,7 @@ class Orchestrator:
             step_start = time.time()
             await emit_progress("research", "started", "Researching sources...", 30.0)
             
-            sources = await self.research_agent.process(query_analysis)
+            sources = await self.research_agent.process(query_analysis, mode_config)
             print(f"   Found {len(sources)} relevant sections")
             
             # Report the domains visited
@@ -279,60 +507,11 @@ class Orchestrator:
                 confidence_score=0.0
             )
 
-        # Step 2.5: Analyze images with AI for better placement
-        print("\n🖼️  Analyzing images...")
+        # OPTIMIZED: Step 2.5 & 3 - Image analysis only touches source.images and
+        # summarization only reads source.content, so their LLM calls run concurrently
+        print("\n🖼️  Analyzing images and 📝 summarizing content in parallel...")
         step_start = time.time()
         await emit_progress("image_analysis", "started", "Analyzing images with AI for contextual placement...", 42.0)
-        
-        # Collect all images from sources
-        all_images = []
-        for source in sources:
-            if hasattr(source, 'images') and source.images:
-                all_images.extend(source.images)
-        
-        if all_images:
-            # Remove duplicates based on URL
-            unique_images = []
-            seen_urls = set()
-            for img in all_images:
-                if img.get('url') and img['url'] not in seen_urls:
-                    seen_urls.add(img['url'])
-                    unique_images.append(img)
-            
-            # Limit to max 15 images for AI analysis
-            max_analyze = 15
-            if len(unique_images) > max_analyze:
-                print(f"   Found {len(unique_images)} unique images, limiting to {max_analyze} for AI analysis")
-                unique_images = unique_images[:max_analyze]
-            else:
-                print(f"   Found {len(unique_images)} unique images to analyze")
-            
-            # Analyze images with AI
-            main_topic = query_analysis.get('main_topic', query)
-            analyzed_images = await self.image_analyzer.analyze_images(unique_images, query, main_topic)
-            
-            # Update sources with analyzed images
-            for source in sources:
-                if hasattr(source, 'images') and source.images:
-                    # Replace with analyzed versions
-                    enhanced_imgs = []
-                    for img in source.images:
-                        # Find the analyzed version
-                        analyzed = next((ai for ai in analyzed_images if ai.get('url') == img.get('url')), None)
-                        enhanced_imgs.append(analyzed if analyzed else img)
-                    source.images = enhanced_imgs
-            
-            await emit_progress("image_analysis", "completed", f"Analyzed {len(analyzed_images)} images", 45.0)
-            print(f"   ✅ Image analysis complete")
-        else:
-            await emit_progress("image_analysis", "completed", "No images found in sources", 45.0)
-            print(f"   ℹ️  No images found to analyze")
-        
-        step_times["image_analysis"] = time.time() - step_start
-
-        # Step 3: Summarize
-        print("\n📝 Summarizing content...")
-        step_start = time.time()
         await emit_progress(
             "summarization", 
             "started", 
@@ -343,12 +522,19 @@ class Orchestrator:
             sources_found=len(sources)
         )
         
-        summaries = await self.summarizer_agent.process(
-            sources,
-            query_analysis.get('main_topic', query)
+        image_count, summaries = await asyncio.gather(
+            self._analyze_source_images(sources, query, query_analysis.get('main_topic', query)),
+            self.summarizer_agent.process(
+                sources,
+                query_analysis.get('main_topic', query)
+            )
         )
         print(f"   Generated {len(summaries)} summaries")
         
+        if image_count is None:
+            await emit_progress("image_analysis", "completed", "No images found in sources", 55.0)
+        else:
+            await emit_progress("image_analysis", "completed", f"Analyzed {image_count} images", 55.0)
         await emit_progress(
             "summarization", 
             "completed", 
@@ -359,7 +545,7 @@ class Orchestrator:
             sources_found=len(summaries)
         )
         
-        step_times["summarization"] = time.time() - step_start
+        step_times["image_analysis_and_summarization"] = time.time() - step_start
 
         # OPTIMIZED: Step 4 & 5 - Run verification and reasoning in parallel
         print("\n🚀 Running verification and synthesis in parallel...")
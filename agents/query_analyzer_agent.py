@@ -2,12 +2,16 @@
 Query Analyzer Agent for Academic Research Paper Generator
 """
 
+import asyncio
 import json
-from typing import Dict, Any, List
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 
 from langchain_core.prompts import PromptTemplate
 
 from .base_agent import BaseAgent
+from .config import Config
 
 
 class QueryAnalyzerAgent(BaseAgent):
@@ -29,6 +33,10 @@ class QueryAnalyzerAgent(BaseAgent):
     The agent uses two prompt strategies:
     1. Web-informed analysis (preferred): Uses web search results to guide question generation
     2. Fallback analysis: Direct query analysis if web search fails
+    
+    Successful analyses are kept in an in-process LRU keyed by the normalized
+    query and question count, so repeated queries skip both the context web
+    search and the LLM call.
     """
 
     def __init__(self):
@@ -183,6 +191,51 @@ Respond with ONLY this JSON structure (no markdown, no additional text):
 
 NOW ANALYZE THE QUERY AND RESPOND WITH ONLY THE JSON OBJECT."""
         )
+        self.chain = self.prompt | self.llm
+        # Web-informed chains keyed by max_questions, built on first use
+        self._custom_chains: Dict[int, Any] = {}
+        # OPTIMIZED: LRU of recent analyses keyed by (normalized query, max_questions)
+        self.analysis_cache: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    @staticmethod
+    def _copy_analysis(analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy an analysis so callers extending search_terms never touch the cached list."""
+        return {**analysis, "search_terms": list(analysis.get("search_terms", []))}
+
+    def _get_cached_analysis(self, key: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached analysis for the key, dropping it if expired."""
+        entry = self.analysis_cache.get(key)
+        if entry is None:
+            return None
+        cached_at, analysis = entry
+        if time.time() - cached_at > Config.QUERY_ANALYSIS_CACHE_TTL:
+            del self.analysis_cache[key]
+            return None
+        self.analysis_cache.move_to_end(key)
+        return self._copy_analysis(analysis)
+
+    def _cache_analysis(self, key: Tuple[str, int], analysis: Dict[str, Any]) -> None:
+        """Store an analysis in the LRU cache, evicting the oldest if full."""
+        self.analysis_cache[key] = (time.time(), self._copy_analysis(analysis))
+        self.analysis_cache.move_to_end(key)
+        while len(self.analysis_cache) > Config.QUERY_ANALYSIS_CACHE_SIZE:
+            self.analysis_cache.popitem(last=False)
+
+    def _get_custom_chain(self, max_questions: int):
+        """
+        Return the web-informed analysis chain for a question count, building it once.
+        
+        Args:
+            max_questions (int): Maximum number of search questions to generate
+            
+        Returns:
+            Runnable: Customized prompt piped into the LLM
+        """
+        chain = self._custom_chains.get(max_questions)
+        if chain is None:
+            chain = self._create_custom_prompt(max_questions) | self.llm
+            self._custom_chains[max_questions] = chain
+        return chain
 
     def _create_custom_prompt(self, max_questions: int) -> PromptTemplate:
         """
@@ -351,9 +404,18 @@ NOW ANALYZE THE QUERY AND RESPOND WITH ONLY THE JSON OBJECT."""
              'How does quantum computing differ from classical computing?', ...]
         """
         
-        # Step 1: Perform web search to gather context
+        # OPTIMIZED: Reuse a recent analysis of the same query (case and
+        # whitespace differences ignored)
+        cache_key = (" ".join(query.lower().split()), max_questions)
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            print(f"   ⚡ Reusing cached analysis for: {query}")
+            return cached
+        
+        # Step 1: Perform web search to gather context (in a worker thread, the
+        # search client is blocking)
         print(f"   🌐 Searching web for context on: {query} (max {max_questions} questions)")
-        web_results = self._perform_web_search(query, max_results=5)
+        web_results = await asyncio.to_thread(self._perform_web_search, query, 5)
         
         # Step 2: Format web results for the LLM
         web_context = self._extract_snippets_from_results(web_results)
@@ -361,16 +423,14 @@ NOW ANALYZE THE QUERY AND RESPOND WITH ONLY THE JSON OBJECT."""
         # Step 3: Create dynamic prompt based on max_questions
         if web_results:
             # Create a customized prompt with the specific number of questions
-            custom_prompt = self._create_custom_prompt(max_questions)
-            chain = custom_prompt | self.llm
+            chain = self._get_custom_chain(max_questions)
             result = await chain.ainvoke({
                 "query": query,
                 "web_results": web_context
             })
         else:
             print("   ⚠️ No web results, using fallback analysis")
-            chain = self.prompt | self.llm
-            result = await chain.ainvoke({"query": query})
+            result = await self.chain.ainvoke({"query": query})
 
         # Extract content from the response
         content = result.content if hasattr(result, 'content') else str(result)
@@ -381,6 +441,7 @@ NOW ANALYZE THE QUERY AND RESPOND WITH ONLY THE JSON OBJECT."""
             # Ensure we don't exceed max_questions
             if 'search_terms' in analysis:
                 analysis['search_terms'] = analysis['search_terms'][:max_questions]
+            self._cache_analysis(cache_key, analysis)
             return analysis
         except json.JSONDecodeError:
             # Fallback to basic extraction
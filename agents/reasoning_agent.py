@@ -185,6 +185,7 @@ BEGIN YOUR PhD-GRADE RESEARCH PAPER NOW:
 
 ---"""
         )
+        self.chain = self.prompt | self.llm
 
     def _enhance_citation_density(self, answer: str, num_sources: int) -> str:
         """Post-process answer to ensure better citation distribution"""
@@ -347,8 +348,7 @@ BEGIN YOUR PhD-GRADE RESEARCH PAPER NOW:
 
         print(f"   📝 Generating PhD-grade research paper with {len(summaries)} sources...")
 
-        chain = self.prompt | self.llm
-        result = await chain.ainvoke({
+        result = await self.chain.ainvoke({
             "query": query,
             "summaries": summaries_text
         })
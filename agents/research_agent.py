@@ -4,12 +4,13 @@ Research Agent for Academic Research Paper Generator
 
 import asyncio
 import hashlib
+import heapq
 import json
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Optional
 
 import requests
 from bs4 import BeautifulSoup
-from langchain_core.prompts import PromptTemplate
 from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
 from urllib.parse import urlparse
 
@@ -44,21 +45,59 @@ class ResearchAgent(BaseAgent):
         search_wrapper (DuckDuckGoSearchAPIWrapper): Web search API wrapper
     """
 
+    # Pre-compiled patterns for pulling JSON term lists out of LLM responses
+    JSON_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(\[.*?\])\s*```", re.DOTALL)
+    JSON_ARRAY_PATTERN = re.compile(r"\[[^\[\]]*\]")
+
     def __init__(self):
         """Initialize the research agent with search capabilities."""
         super().__init__("Research")
         self.search_wrapper = DuckDuckGoSearchAPIWrapper()
-        # Create a session with connection pooling for better performance
+        # Create a session with connection pooling for better performance. The agent
+        # lives on the shared orchestrator, so this one session serves every search;
+        # keep a pool per host for many hosts so keep-alive connections survive
+        # across searches instead of being evicted after the 10th distinct domain
         self.session = requests.Session()
         adapter = requests.adapters.HTTPAdapter(
-            pool_connections=10,
-            pool_maxsize=20,
+            pool_connections=100,
+            pool_maxsize=max(20, Config.MAX_CONCURRENT_SCRAPING),
             max_retries=3,
             pool_block=False
         )
         self.session.mount('http://', adapter)
         self.session.mount('https://', adapter)
 
+    @classmethod
+    def _parse_json_list(cls, text: str) -> Any:
+        """
+        Extract a JSON array from an LLM response in a single regex pass.
+        
+        Accepts a fenced ```json block, a bare JSON response, or an array embedded
+        in surrounding prose.
+        
+        Args:
+            text (str): Raw LLM response text
+            
+        Returns:
+            Any: The decoded JSON value
+            
+        Raises:
+            json.JSONDecodeError: If no parseable JSON array is found
+        """
+        match = cls.JSON_FENCE_PATTERN.search(text)
+        if match:
+            return json.loads(match.group(1))
+        
+        cleaned_text = text.strip()
+        if cleaned_text.startswith('['):
+            try:
+                return json.loads(cleaned_text)
+            except json.JSONDecodeError:
+                pass
+        
+        match = cls.JSON_ARRAY_PATTERN.search(cleaned_text)
+        return json.loads(match.group(0) if match else cleaned_text)
+
     def _calculate_advanced_relevance_score(self, content: str, keywords: List[str], section_name: str, title: str, url: str) -> float:
         """
         Calculate comprehensive relevance score for content using multiple quality factors.
@@ -412,7 +451,7 @@ class ResearchAgent(BaseAgent):
         
         return images[:10]  # Limit final count to 10 best images
 
-    def extract_content_with_sections(self, url: str, keywords: List[str]) -> List[SourceMetadata]:
+    def extract_content_with_sections(self, url: str, keywords: List[str], request_timeout: Optional[int] = None, max_content_length: Optional[int] = None) -> List[SourceMetadata]:
         """
         Extract structured content from a URL with section-level tracking.
         
@@ -423,6 +462,8 @@ class ResearchAgent(BaseAgent):
         Args:
             url (str): The URL to scrape and extract content from
             keywords (List[str]): Keywords for relevance scoring
+            request_timeout (Optional[int]): HTTP timeout in seconds (defaults to Config.REQUEST_TIMEOUT)
+            max_content_length (Optional[int]): Per-section content cap (defaults to Config.MAX_CONTENT_LENGTH)
             
         Returns:
             List[SourceMetadata]: List of extracted content sections, each with:
@@ -434,13 +475,17 @@ class ResearchAgent(BaseAgent):
                 
         Note:
             Handles HTTP errors gracefully, returning empty list on failure.
-            Respects Config.REQUEST_TIMEOUT and Config.MAX_CONTENT_LENGTH.
+            Respects the request timeout and content length limits.
         """
         sections = []
         soup = None  # Initialize to None for cleanup
+        if request_timeout is None:
+            request_timeout = Config.REQUEST_TIMEOUT
+        if max_content_length is None:
+            max_content_length = Config.MAX_CONTENT_LENGTH
 
         try:
-            response = self.session.get(url, timeout=Config.REQUEST_TIMEOUT)
+            response = self.session.get(url, timeout=request_timeout)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'html.parser')
 
@@ -492,7 +537,7 @@ class ResearchAgent(BaseAgent):
                         title=title_text,
                         section=section_name,
                         paragraph_id=para_id,
-                        content=content[:Config.MAX_CONTENT_LENGTH],
+                        content=content[:max_content_length],
                         relevance_score=relevance,
                         trust_flag=trust_info['trust_flag'],
                         trust_score=trust_info['trust_score'],
@@ -519,7 +564,7 @@ class ResearchAgent(BaseAgent):
                             title=title_text,
                             section="Main Content",
                             paragraph_id="main",
-                            content=content[:Config.MAX_CONTENT_LENGTH],
+                            content=content[:max_content_length],
                             relevance_score=relevance,
                             trust_flag=trust_info['trust_flag'],
                             trust_score=trust_info['trust_score'],
@@ -539,11 +584,17 @@ class ResearchAgent(BaseAgent):
 
         return sections
 
-    async def process(self, query_analysis: Dict[str, Any]) -> List[SourceMetadata]:
+    async def process(self, query_analysis: Dict[str, Any], mode_config: Optional[Dict[str, Any]] = None) -> List[SourceMetadata]:
         """Process search and extraction with multi-keyword deep search"""
         all_sources = []
         seen_urls = set()
 
+        # Per-search limits come from the search mode, falling back to global config
+        mode_config = mode_config or {}
+        max_results = mode_config.get("max_results_per_search", Config.MAX_RESULTS_PER_SEARCH)
+        request_timeout = mode_config.get("request_timeout", Config.REQUEST_TIMEOUT)
+        max_content_length = mode_config.get("max_content_length", Config.MAX_CONTENT_LENGTH)
+
         # Get search terms and main topic
         search_terms = query_analysis.get('search_terms', [])
         main_topic = query_analysis.get('main_topic', '')
@@ -555,21 +606,11 @@ class ResearchAgent(BaseAgent):
 Return ONLY a JSON list of unique, meaningful phrases (max 6 additional terms).
 Example format: ["machine learning agent", "autonomous software", "AI system architecture"]"""
 
-            from langchain_core.prompts import PromptTemplate
-            prompt = PromptTemplate(input_variables=["text"], template="{text}")
-            chain = prompt | self.llm
-            result = await chain.ainvoke({"text": expansion_prompt})
+            result = await self.llm.ainvoke(expansion_prompt)
             expansion_text = result.content if hasattr(result, 'content') else str(result)
 
-            # Clean and parse the response
-            cleaned_text = expansion_text.strip()
-            # Remove markdown code blocks if present
-            if "```" in cleaned_text:
-                cleaned_text = cleaned_text.split("```")[1] if "```" in cleaned_text else cleaned_text
-                cleaned_text = cleaned_text.replace("json", "").strip()
-
             # Parse expanded terms
-            expanded_terms = json.loads(cleaned_text)
+            expanded_terms = self._parse_json_list(expansion_text)
             if isinstance(expanded_terms, list):
                 # Add expanded terms while avoiding duplicates
                 original_terms = [term.lower() for term in search_terms]
@@ -586,7 +627,7 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
             """Inner coroutine: search and extract for one term with parallel content extraction"""
             try:
                 # Run the synchronous search in a thread to avoid blocking
-                results = await asyncio.to_thread(self.search_web, term, Config.MAX_RESULTS_PER_SEARCH)
+                results = await asyncio.to_thread(self.search_web, term, max_results)
                 print(f"   ✅ Found {len(results)} results for: '{term}'")
 
                 local_sources = []
@@ -645,7 +686,9 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
                 # OPTIMIZED: Extract content from multiple URLs in parallel (batches of MAX_CONCURRENT_SCRAPING)
                 async def extract_with_semaphore(url, domain, is_trusted):
                     """Extract content with concurrency control"""
-                    sources = await asyncio.to_thread(self.extract_content_with_sections, url, search_terms)
+                    sources = await asyncio.to_thread(
+                        self.extract_content_with_sections, url, search_terms, request_timeout, max_content_length
+                    )
                     trust_indicator = "🛡️ TRUSTED" if is_trusted else "📄"
                     print(f"   {trust_indicator} Extracted {len(sources)} sections from: {domain}")
                     return sources
@@ -697,7 +740,6 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
                 unique_sources.append(src)
 
         # Enhanced final selection with trust prioritization
-        from urllib.parse import urlparse
         final_sources = []
         domain_final_counts = {}
         trusted_counts = {}
@@ -744,7 +786,7 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
 
         # First pass: Select trusted sources (more lenient domain limits)
         for src in trusted_sources:
-            domain = src.domain or urlparse(src.url).netloc.lower()
+            domain = src.domain
             trusted_limit = Config.MAX_SOURCES_PER_DOMAIN_FINAL * 2  # Allow more trusted sources per domain
 
             if domain_final_counts.get(domain, 0) < trusted_limit:
@@ -761,7 +803,7 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
             if remaining_slots <= 0:
                 break
 
-            domain = src.domain or urlparse(src.url).netloc.lower()
+            domain = src.domain
             if domain_final_counts.get(domain, 0) < Config.MAX_SOURCES_PER_DOMAIN_FINAL:
                 final_sources.append(src)
                 domain_final_counts[domain] = domain_final_counts.get(domain, 0) + 1
@@ -783,7 +825,7 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
             for src in remaining_sources:
                 if len(final_sources) >= MIN_SOURCES:
                     break
-                domain = src.domain or urlparse(src.url).netloc.lower()
+                domain = src.domain
                 # Allow up to double the normal domain limit for minimum guarantee
                 if domain_final_counts.get(domain, 0) < Config.MAX_SOURCES_PER_DOMAIN_FINAL * 2:
                     final_sources.append(src)
@@ -798,10 +840,12 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
 
         return final_sources
 
-    async def process_iterative(self, query_analysis: Dict[str, Any], max_iterations: int = 3, progress_callback=None) -> List[SourceMetadata]:
+    async def process_iterative(self, query_analysis: Dict[str, Any], max_iterations: int = 3, progress_callback=None, mode_config: Optional[Dict[str, Any]] = None) -> List[SourceMetadata]:
         """Iterative research: search → analyze → refine → repeat"""
         all_sources = []
         search_history = set()
+        # Lower-cased mirror of search_history, updated incrementally for O(1) lookups
+        lowered_history = set()
         
         print(f"\n🔄 Starting iterative research with {max_iterations} rounds...")
         
@@ -833,7 +877,7 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
             sources_count=0
         )
         
-        initial_sources = await self.process(query_analysis)
+        initial_sources = await self.process(query_analysis, mode_config)
         all_sources.extend(initial_sources)
         
         # Get unique domains from initial sources
@@ -851,6 +895,7 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
         # Track what we've searched
         original_terms = set(query_analysis.get('search_terms', []))
         search_history.update(original_terms)
+        lowered_history.update(term.lower() for term in original_terms)
         
         # Iterative rounds
         for iteration in range(2, max_iterations + 1):
@@ -865,7 +910,7 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
             )
             
             # Extract new search directions from current sources
-            new_search_terms = await self._extract_follow_up_topics(all_sources, search_history, query_analysis)
+            new_search_terms = await self._extract_follow_up_topics(all_sources, search_history, query_analysis, lowered_history)
             
             if not new_search_terms:
                 print("   ✅ No new search directions found, research complete")
@@ -896,7 +941,7 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
             }
             
             # Search with new terms
-            iteration_sources = await self.process(iteration_query)
+            iteration_sources = await self.process(iteration_query, mode_config)
             
             # Filter out duplicates and add to collection
             new_sources = []
@@ -925,16 +970,20 @@ Example format: ["machine learning agent", "autonomous software", "AI system arc
             
             # Update search history
             search_history.update(new_search_terms)
+            lowered_history.update(term.lower() for term in new_search_terms)
         
         # Final deduplication and selection
         print(f"\n🎯 Iterative research complete: {len(all_sources)} total sources found")
         return self._final_iterative_selection(all_sources)
     
-    async def _extract_follow_up_topics(self, sources: List[SourceMetadata], search_history: set, original_query: Dict[str, Any]) -> List[str]:
+    async def _extract_follow_up_topics(self, sources: List[SourceMetadata], search_history: set, original_query: Dict[str, Any], lowered_history: set = None) -> List[str]:
         """Extract new search topics from existing sources"""
         if not sources:
             return []
         
+        if lowered_history is None:
+            lowered_history = {s.lower() for s in search_history}
+        
         # Sample content from top sources for analysis
         sample_content = []
         for src in sorted(sources, key=lambda x: x.relevance_score, reverse=True)[:10]:
@@ -960,25 +1009,18 @@ Return ONLY a JSON list of specific, focused search terms (avoid duplicating alr
 ["specific term 1", "specific term 2", ...]"""
 
         try:
-            from langchain_core.prompts import PromptTemplate
-            chain = PromptTemplate(input_variables=["text"], template="{text}") | self.llm
-            result = await chain.ainvoke({"text": prompt})
+            result = await self.llm.ainvoke(prompt)
             
             response_text = result.content if hasattr(result, 'content') else str(result)
             
-            # Clean and parse response
-            cleaned_text = response_text.strip()
-            if "```" in cleaned_text:
-                cleaned_text = cleaned_text.split("```")[1] if "```" in cleaned_text else cleaned_text
-                cleaned_text = cleaned_text.replace("json", "").strip()
-            
-            follow_up_terms = json.loads(cleaned_text)
+            # Parse response
+            follow_up_terms = self._parse_json_list(response_text)
             
             if isinstance(follow_up_terms, list):
                 # Filter out terms we've already searched and ensure they're strings
                 new_terms = []
                 for term in follow_up_terms:
-                    if isinstance(term, str) and term.lower() not in {s.lower() for s in search_history}:
+                    if isinstance(term, str) and term.lower() not in lowered_history:
                         new_terms.append(term)
                 
                 print(f"   🧩 Identified follow-up topics: {new_terms[:5]}")
@@ -989,22 +1031,34 @@ Return ONLY a JSON list of specific, focused search terms (avoid duplicating alr
         
         return []
     
+    @staticmethod
+    def _iter_by_relevance(sources: List[SourceMetadata]):
+        """
+        Yield sources in descending relevance order, sorting lazily.
+        
+        Heapifies in O(N) and pops one source at a time, so callers that stop after
+        the top K pay O(N + K log N) instead of a full sort.
+        """
+        heap = [(-src.relevance_score, idx, src) for idx, src in enumerate(sources)]
+        heapq.heapify(heap)
+        while heap:
+            yield heapq.heappop(heap)[2]
+
     def _final_iterative_selection(self, all_sources: List[SourceMetadata]) -> List[SourceMetadata]:
         """Select best sources from iterative research with enhanced diversity"""
         if not all_sources:
             return []
         
         # Enhanced selection for iterative results
-        from urllib.parse import urlparse
         final_sources = []
         domain_counts = {}
         trusted_counts = {}
         
-        # Separate by trust and sort by relevance
-        trusted_sources = sorted([src for src in all_sources if src.is_trusted], 
-                                key=lambda x: x.relevance_score, reverse=True)
-        untrusted_sources = sorted([src for src in all_sources if not src.is_trusted], 
-                                  key=lambda x: x.relevance_score, reverse=True)
+        # Split by trust in a single pass
+        trusted_sources = []
+        untrusted_sources = []
+        for src in all_sources:
+            (trusted_sources if src.is_trusted else untrusted_sources).append(src)
         
         print(f"   📊 Iterative selection from {len(trusted_sources)} trusted + {len(untrusted_sources)} untrusted sources")
         
@@ -1013,22 +1067,22 @@ Return ONLY a JSON list of specific, focused search terms (avoid duplicating alr
         MAX_PER_DOMAIN_ITERATIVE = Config.MAX_SOURCES_PER_DOMAIN_FINAL * 3
         
         # Select trusted sources first (more generous limits)
-        for src in trusted_sources:
+        for src in self._iter_by_relevance(trusted_sources):
             if len(final_sources) >= MAX_ITERATIVE_SOURCES * 0.6:  # 60% can be trusted
                 break
                 
-            domain = src.domain or urlparse(src.url).netloc.lower()
+            domain = src.domain
             if domain_counts.get(domain, 0) < MAX_PER_DOMAIN_ITERATIVE:
                 final_sources.append(src)
                 domain_counts[domain] = domain_counts.get(domain, 0) + 1
                 trusted_counts[domain] = trusted_counts.get(domain, 0) + 1
         
         # Fill remaining with untrusted sources
-        for src in untrusted_sources:
+        for src in self._iter_by_relevance(untrusted_sources):
             if len(final_sources) >= MAX_ITERATIVE_SOURCES:
                 break
                 
-            domain = src.domain or urlparse(src.url).netloc.lower()
+            domain = src.domain
             if domain_counts.get(domain, 0) < MAX_PER_DOMAIN_ITERATIVE:
                 final_sources.append(src)
                 domain_counts[domain] = domain_counts.get(domain, 0) + 1
@@ -1037,4 +1091,3 @@ Return ONLY a JSON list of specific, focused search terms (avoid duplicating alr
         print(f"   🛡️ Including {sum(trusted_counts.values())} trusted sources from {len(trusted_counts)} domains")
         
         return final_sources
-
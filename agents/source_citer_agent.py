@@ -2,14 +2,37 @@
 Source Citer Agent for Academic Research Paper Generator
 """
 
+import re
 from datetime import datetime
+from functools import lru_cache
 from typing import List
-from urllib.parse import urlparse
 
 from .base_agent import BaseAgent
 from .data_models import ProcessedContent
 
 
+# Fallback domain classification rules, checked in priority order. Each rule is a
+# single pre-compiled alternation so a domain is scanned once per rule in C.
+_DOMAIN_TYPE_PATTERNS = (
+    (re.compile(r'wikipedia'), "Encyclopedia"),
+    (re.compile(r'edu|gov|org'), "Institutional"),
+    (re.compile(r'journal|academic|research'), "Academic"),
+)
+
+
+@lru_cache(maxsize=500)
+def _classify_domain(domain: str) -> str:
+    """
+    Fallback source type for citations without a trust category.
+    
+    Cached per domain so repeated renders never re-run the pattern checks.
+    """
+    for pattern, source_type in _DOMAIN_TYPE_PATTERNS:
+        if pattern.search(domain):
+            return source_type
+    return "Web Resource"
+
+
 class SourceCiterAgent(BaseAgent):
     """
     Formats source citations in academic style with trust and relevance metadata.
@@ -57,22 +80,11 @@ class SourceCiterAgent(BaseAgent):
             source = summary.source
 
             # Use trust category if available, otherwise fall back to domain classification
-            if hasattr(source, 'trust_category') and source.trust_category:
+            if source.trust_category:
                 source_type = source.trust_category
-                trust_indicator = f"🛡️ " if source.is_trusted else ""
+                trust_indicator = "🛡️ " if source.is_trusted else ""
             else:
-                # Fallback to old classification
-                from urllib.parse import urlparse
-                domain = urlparse(source.url).netloc.lower()
-
-                if 'wikipedia' in domain:
-                    source_type = "Encyclopedia"
-                elif any(x in domain for x in ['edu', 'gov', 'org']):
-                    source_type = "Institutional"
-                elif any(x in domain for x in ['journal', 'academic', 'research']):
-                    source_type = "Academic"
-                else:
-                    source_type = "Web Resource"
+                source_type = _classify_domain(source.domain)
                 trust_indicator = ""
 
             # Create enhanced citation with trust information
@@ -81,7 +93,7 @@ class SourceCiterAgent(BaseAgent):
 
             # Add trust score if available
             trust_info = ""
-            if hasattr(source, 'trust_score') and source.trust_score:
+            if source.trust_score:
                 trust_info = f" Trust Score: {source.trust_score}/100."
 
             # Format: [1] 🛡️ Title. (Academic & Research Institution), Section: Name. Retrieved from: URL. Relevance: 85% Trust Score: 95/100
@@ -96,8 +108,6 @@ class SourceCiterAgent(BaseAgent):
         if not summaries:
             return ""
 
-        sources_section = "\n## References\n\n"
-
         # Group sources by trust category first
         trust_categories = {}
         web_resources = []
@@ -105,69 +115,60 @@ class SourceCiterAgent(BaseAgent):
         for i, summary in enumerate(summaries, 1):
             source = summary.source
 
-            # Use trust category if available
-            if hasattr(source, 'trust_category') and source.trust_category and source.is_trusted:
-                category = source.trust_category
-                if category not in trust_categories:
-                    trust_categories[category] = []
-            else:
-                # Fallback for untrusted sources
-                category = "Web Resources"
-
             # Format academic reference
             title = source.title if source.title else "Untitled Document"
             section_info = f" Section: {source.section}." if source.section else ""
             timestamp = source.timestamp[:10] if source.timestamp else "n.d."
+            trust_indicator = "🛡️ " if source.is_trusted else ""
+            reference = f"[{i}] {trust_indicator}{title}.{section_info} Retrieved {timestamp}, from {source.url}\n"
 
-            trust_indicator = "🛡️ " if getattr(source, 'is_trusted', False) else ""
-            reference = f"[{i}] {trust_indicator}{title}.{section_info} Retrieved {timestamp}, from {source.url}"
-
-            if category in trust_categories:
-                trust_categories[category].append(reference)
+            # Use trust category if available, fall back to web resources for untrusted sources
+            if source.trust_category and source.is_trusted:
+                trust_categories.setdefault(source.trust_category, []).append(reference)
             else:
                 web_resources.append(reference)
 
+        # Build the section from parts instead of repeated string concatenation
+        parts = ["\n## References\n\n"]
+
         # Output trusted sources first, grouped by category
-        for category in sorted(trust_categories.keys()):
-            if trust_categories[category]:
-                sources_section += f"### {category}\n"
-                for ref in trust_categories[category]:
-                    sources_section += f"{ref}\n"
-                sources_section += "\n"
+        for category in sorted(trust_categories):
+            parts.append(f"### {category}\n")
+            parts.extend(trust_categories[category])
+            parts.append("\n")
 
         # Output other web resources last
         if web_resources:
-            sources_section += "### Web Resources\n"
-            for ref in web_resources:
-                sources_section += f"{ref}\n"
-            sources_section += "\n"
+            parts.append("### Web Resources\n")
+            parts.extend(web_resources)
+            parts.append("\n")
 
-        return sources_section
+        return "".join(parts)
 
     def create_markdown_research_paper(self, query: str, answer: str, summaries: List[ProcessedContent], confidence: float) -> str:
         """Create a complete markdown research paper with trust metrics"""
         sources_section = self.format_sources_section(summaries)
         citations_section = self.format_citations(summaries)
 
-        # Count unique sources and domains
-        unique_sources = len(set(s.source.url for s in summaries))
-        from urllib.parse import urlparse
-        unique_domains = len(set(urlparse(s.source.url).netloc for s in summaries))
-
-        # Calculate trust statistics
-        trusted_sources = sum(1 for s in summaries if getattr(s.source, 'is_trusted', False))
-        trust_percentage = (trusted_sources / len(summaries) * 100) if summaries else 0
-
-        # Get trust category distribution
+        # Gather all statistics in a single pass over the summaries
+        urls = set()
+        domains = set()
+        trusted_sources = 0
         trust_categories = {}
+        trust_score_sum = 0
         for s in summaries:
-            if hasattr(s.source, 'trust_category') and getattr(s.source, 'is_trusted', False):
-                category = s.source.trust_category
-                trust_categories[category] = trust_categories.get(category, 0) + 1
-
-        # Calculate average trust score
-        trust_scores = [getattr(s.source, 'trust_score', 50) for s in summaries]
-        avg_trust_score = sum(trust_scores) / len(trust_scores) if trust_scores else 50
+            source = s.source
+            urls.add(source.url)
+            domains.add(source.domain)
+            trust_score_sum += source.trust_score
+            if source.is_trusted:
+                trusted_sources += 1
+                trust_categories[source.trust_category] = trust_categories.get(source.trust_category, 0) + 1
+
+        unique_sources = len(urls)
+        unique_domains = len(domains)
+        trust_percentage = (trusted_sources / len(summaries) * 100) if summaries else 0
+        avg_trust_score = trust_score_sum / len(summaries) if summaries else 50
 
         markdown_content = f"""**Research Date**: {datetime.now().strftime('%B %d, %Y')}
 **Confidence Level**: {confidence:.1%}
@@ -0,0 +1,199 @@
+"""
+Persistent Summary Cache for Academic Research Paper Generator
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def summary_cache_key(topic: str, section: str, content: str, model: str, prompt_version: str) -> bytes:
+    """
+    Build the cache key for one summarization input.
+
+    The topic is canonicalized (lower-cased, whitespace collapsed) so trivially
+    different phrasings of the same research topic share cached summaries. The
+    model and prompt version are part of the key, so switching models or editing
+    the prompt never serves summaries written under the old setup.
+
+    Args:
+        topic (str): Research topic the summary is written for
+        section (str): Source section name
+        content (str): Source content being summarized
+        model (str): Name of the model that writes the summary
+        prompt_version (str): Version of the summarization prompt
+
+    Returns:
+        bytes: SHA-256 digest identifying the input
+    """
+    topic_canonical = " ".join(topic.lower().split())
+    return hashlib.sha256(
+        f"{model}\x1f{prompt_version}\x1f{topic_canonical}\x1f{section}\x1f{content}".encode()
+    ).digest()
+
+
+class SummaryCache:
+    """
+    Two-level store of source summaries shared across research runs.
+
+    An in-process LRU (L1) answers repeated lookups within the same server
+    process without touching disk; misses fall through to SQLite (L2).
+
+    Re-running or refining a query usually scrapes many of the same page sections
+    again; serving their summaries from disk replaces a full LLM round-trip with a
+    millisecond lookup. The database runs in WAL mode so concurrent readers do not
+    block the writer, and all blocking SQLite calls are executed in a worker thread
+    to keep the event loop free.
+
+    Entries older than the TTL are treated as misses and pruned on write. Any
+    database error is logged and degrades to a cache miss so summarization never
+    fails because of the cache.
+
+    Attributes:
+        path (str): Filesystem path of the SQLite database
+        ttl_seconds (int): Maximum age of a usable entry
+        memory_size (int): Maximum number of entries kept in the in-memory LRU
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, memory_size: int = 0):
+        """
+        Initialize the cache; the database is opened lazily on first use.
+
+        Args:
+            path (str): Filesystem path of the SQLite database
+            ttl_seconds (int): Maximum age in seconds of a usable entry
+            memory_size (int): Maximum number of entries kept in the in-memory LRU
+                (0 disables the L1 layer)
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[bytes, Tuple[str, int]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database and create the schema on first use."""
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS summaries (
+                    key BLOB PRIMARY KEY,
+                    topic TEXT,
+                    url TEXT,
+                    section TEXT,
+                    content_hash BLOB,
+                    summary TEXT,
+                    created_at INTEGER
+                )"""
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _get_many(self, keys: List[bytes]) -> List[Tuple[bytes, str, int]]:
+        """Blocking lookup of all fresh entries as (key, summary, created_at) rows."""
+        cutoff = int(time.time()) - self.ttl_seconds
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT key, summary, created_at FROM summaries WHERE key IN ({placeholders}) AND created_at >= ?",
+                (*keys, cutoff)
+            ).fetchall()
+        return [(bytes(key), summary, created_at) for key, summary, created_at in rows]
+
+    def _put_many(self, rows: List[Tuple[bytes, str, str, str, str, str]]) -> None:
+        """Blocking write-through of new summaries, pruning expired entries."""
+        now = int(time.time())
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO summaries "
+                "(key, topic, url, section, content_hash, summary, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (key, topic, url, section, hashlib.sha256(content.encode()).digest(), summary, now)
+                    for key, topic, url, section, content, summary in rows
+                ]
+            )
+            conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.commit()
+
+    def _remember(self, key: bytes, summary: str, created_at: int) -> None:
+        """Insert an entry into the in-memory LRU, evicting the oldest if full."""
+        if not self.memory_size:
+            return
+        self._memory[key] = (summary, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    async def get_many(self, keys: List[bytes]) -> Dict[bytes, str]:
+        """
+        Look up cached summaries without blocking the event loop.
+
+        Keys are answered from the in-memory LRU first; only the remainder is
+        looked up in SQLite, and those hits are promoted into memory.
+
+        Args:
+            keys (List[bytes]): Keys built with summary_cache_key()
+
+        Returns:
+            Dict[bytes, str]: Cached summaries for the keys that hit
+        """
+        if not keys:
+            return {}
+
+        cutoff = int(time.time()) - self.ttl_seconds
+        found: Dict[bytes, str] = {}
+        missing: List[bytes] = []
+        for key in keys:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] >= cutoff:
+                self._memory.move_to_end(key)
+                found[key] = entry[0]
+            else:
+                missing.append(key)
+
+        if not missing:
+            return found
+        try:
+            stored = await asyncio.to_thread(self._get_many, missing)
+        except Exception as e:
+            print(f"   ⚠️ Summary cache read failed: {e}")
+            return found
+
+        # Promoted entries keep their stored age so they expire from memory
+        # exactly when they would in SQLite
+        for key, summary, created_at in stored:
+            self._remember(key, summary, created_at)
+            found[key] = summary
+        return found
+
+    async def put_many(self, rows: Iterable[Tuple[bytes, str, str, str, str, str]]) -> None:
+        """
+        Store new summaries without blocking the event loop.
+
+        Args:
+            rows: Tuples of (key, topic, url, section, content, summary)
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        now = int(time.time())
+        for key, _, _, _, _, summary in rows:
+            self._remember(key, summary, now)
+        try:
+            await asyncio.to_thread(self._put_many, rows)
+        except Exception as e:
+            print(f"   ⚠️ Summary cache write failed: {e}")
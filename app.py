@@ -18,35 +18,34 @@ Main endpoints:
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi import FastAPI, HTTPException, Header, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional, Callable, Literal
-from contextlib import asynccontextmanager
+from fastapi.responses import StreamingResponse, ORJSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, StringConstraints
+from typing import Annotated, AsyncIterator, Awaitable, List, Dict, Any, Optional, Callable, Literal, Tuple
+from contextlib import asynccontextmanager, suppress
 import asyncio
 import uvicorn
-import json
-from datetime import datetime
+from datetime import datetime, timezone
 import uuid
-import dataclasses
+import orjson
 
 # Import the existing search functionality
 from aideepseatch import Orchestrator
 from agents.data_models import FinalAnswer, SourceMetadata
 
 # Import subscription middleware
-from subscription_middleware import check_user_quota, increment_user_search, get_quota_headers
+from subscription_middleware import check_user_quota, increment_user_search, build_quota_headers, quota_known_to_allow
 
 # Import history service
-from history_service import save_search_history, get_search_history, delete_search_history_item, clear_all_history
+from history_service import HistoryService, save_search_history, get_search_history, delete_search_history_item, clear_all_history
 
 # Import auth utilities
 from auth_utils import extract_user_from_token, get_optional_user_from_token
 
 # Import new backend-authoritative services
 from search_service import search_service
-from quota_service import quota_service
+from quota_service import quota_service, close_rest_client
 
 # Import security middleware
 from security_middleware import (
@@ -54,6 +53,7 @@ from security_middleware import (
     require_auth,
     optional_auth,
     InputSanitizer,
+    MAX_QUERY_LENGTH,
     webhook_idempotency,
     security_logger
 )
@@ -71,10 +71,17 @@ from security_middleware import (
 from performance_optimization import (
     perf_monitor,
     hash_query,
-    normalize_query
+    normalize_query,
+    start_queue_logging,
+    stop_queue_logging
 )
+import logging
 import os
+import sys
 import time
+import traceback
+
+logger = logging.getLogger(__name__)
 
 # Type alias for search modes
 SearchMode = Literal["deep", "moderate", "quick", "sla"]
@@ -84,11 +91,15 @@ class SearchRequest(BaseModel):
     """
     Request model for search queries.
     
+    The query is stripped and capped at MAX_QUERY_LENGTH by pydantic-core while
+    the body is parsed (longer queries get 422, before the handler runs). Empty
+    queries are left to the endpoints, which reject them with 400.
+    
     Attributes:
-        query (str): The research question or topic to investigate
+        query (str): The research question or topic to investigate (at most MAX_QUERY_LENGTH characters)
         search_mode (SearchMode): Search mode - "deep", "moderate", "quick", or "sla". Default is "deep"
     """
-    query: str
+    query: Annotated[str, StringConstraints(strip_whitespace=True, max_length=MAX_QUERY_LENGTH)]
     search_mode: SearchMode = "deep"  # Default to deep search
 
 class CitationModel(BaseModel):
@@ -190,6 +201,10 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting Omnivionai API...")
     
+    # OPTIMIZED: Log records are written by a background thread so logging on the
+    # request path never blocks the event loop on stderr
+    log_listener = start_queue_logging()
+    
     # REDIS DISABLED - Uncomment below to enable Redis caching
     # # Initialize Redis cache
     # redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -200,7 +215,7 @@ async def lifespan(app: FastAPI):
     #     print(f"⚠️  Redis cache not available: {e}")
     #     print("   System will run without caching (performance may be reduced)")
     
-    print("✅ Omnivionai API ready!")
+    print(f"✅ Omnivionai API ready! (event loop: {type(asyncio.get_running_loop()).__module__})")
     
     yield  # Application runs here
     
@@ -208,6 +223,8 @@ async def lifespan(app: FastAPI):
     print("🛑 Shutting down Omnivionai API...")
     # REDIS DISABLED
     # await cleanup_redis_cache()
+    await close_rest_client()
+    stop_queue_logging(log_listener)
     print("✅ Cleanup complete")
 
 # Create FastAPI app with lifespan
@@ -215,7 +232,9 @@ app = FastAPI(
     title="Omnivionai API",
     description="Academic Research Paper Generator with Multi-Agent Deep Search",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # OPTIMIZED: Encode every JSON response with orjson instead of the stdlib encoder
+    default_response_class=ORJSONResponse
 )
 
 # ============================================================================
@@ -280,6 +299,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "DELETE", "OPTIONS"],  # ✅ Limit to required methods
     allow_headers=["Authorization", "Content-Type", "Accept"],  # ✅ Limit to required headers
+    expose_headers=["X-Next-Cursor"],  # History pagination cursor readable by the frontend
     max_age=3600,  # Cache preflight requests for 1 hour
 )
 
@@ -290,9 +310,290 @@ from starlette.middleware.gzip import GZipMiddleware
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 print("✅ GZIP compression enabled (70-80% bandwidth reduction)")
 
+# ============================================================================
+# Health Probe Fast Path
+# ============================================================================
+
+class HealthCheckFastPath:
+    """
+    Pure ASGI middleware answering GET/HEAD /health before the rest of the stack.
+    
+    OPTIMIZED: Load balancer probes skip the security, rate limiting, request
+    size, CORS and GZIP layers and FastAPI routing; the cached health body is
+    written with two raw ASGI messages.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/health" and scope["method"] in ("GET", "HEAD"):
+            body = _health_body()
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+            return
+        await self.app(scope, receive, send)
+
+# Added last so it is the outermost middleware
+app.add_middleware(HealthCheckFastPath)
+
 # Global orchestrator instance
 orchestrator = Orchestrator()
 
+# Marks the end of a search's progress updates in an SSE queue
+_STREAM_DONE = object()
+
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+# Maximum number of undelivered progress frames buffered per SSE stream
+_SSE_QUEUE_SIZE = 64
+
+# OPTIMIZED: Static response headers of the SSE endpoints, built once
+# (StreamingResponse only reads them)
+_API_SSE_HEADERS: Dict[str, str] = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+    "Content-Encoding": "identity"
+}
+_SEARCH_SSE_HEADERS: Dict[str, str] = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+    "Content-Encoding": "identity",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Cache-Control",
+}
+
+# Upper bound on the bytes of queued SSE frames coalesced into one chunk
+_SSE_COALESCE_BYTES = 8192
+
+# SSE comment frame sent when a stream has been idle, and the idle interval
+_SSE_PING = b": ping\n\n"
+_SSE_PING_INTERVAL = 15.0
+
+
+def _sse_frame(
+    event_type: str,
+    data: Optional[Dict[str, Any]] = None,
+    progress: Optional[Dict[str, Any]] = None,
+    result: Optional[Dict[str, Any]] = None
+) -> bytes:
+    """
+    Encode a StreamingSearchResponse-shaped event as one SSE frame.
+    
+    OPTIMIZED: Events are plain dicts encoded with orjson, skipping pydantic
+    model construction and validation for every streamed event.
+    
+    Args:
+        event_type (str): "progress", "result" or "error"
+        data (Optional[Dict[str, Any]]): Error payload
+        progress (Optional[Dict[str, Any]]): ProgressUpdate fields
+        result (Optional[Dict[str, Any]]): SearchResponse fields
+        
+    Returns:
+        bytes: The encoded SSE "data:" frame
+    """
+    return _SSE_PREFIX + orjson.dumps({
+        "type": event_type,
+        "data": data,
+        "progress": progress,
+        "result": result,
+    }) + _SSE_SUFFIX
+
+
+def _search_payload(result: FinalAnswer) -> Dict[str, Any]:
+    """
+    Build the SearchResponse-shaped payload for a finished search.
+    
+    OPTIMIZED: Citations are passed through as the SourceMetadata slots
+    dataclasses; orjson serializes them natively, so no per-citation dict is
+    built on the response path.
+    
+    Args:
+        result (FinalAnswer): Result returned by the orchestrator
+        
+    Returns:
+        Dict[str, Any]: Payload ready for orjson encoding
+    """
+    return {
+        "answer": result.answer,
+        "citations": result.citations,
+        "confidence_score": result.confidence_score,
+        "markdown_content": result.answer  # Use answer field which has images injected
+    }
+
+
+# Local ISO timestamp and the 10 ms tick it was formatted for
+_progress_timestamp: Tuple[int, str] = (0, "")
+
+
+def _progress_timestamp_now() -> str:
+    """
+    Return the local ISO timestamp for progress events, reformatted at most
+    once per 10 ms.
+    
+    OPTIMIZED: Bursts of progress events (e.g. several steps completing
+    together) share one formatted string instead of each building a datetime.
+    
+    Returns:
+        str: Current local time in ISO format
+    """
+    global _progress_timestamp
+    now = time.time()
+    tick = int(now * 100)
+    if _progress_timestamp[0] != tick:
+        _progress_timestamp = (tick, datetime.fromtimestamp(now).isoformat())
+    return _progress_timestamp[1]
+
+
+def _utc_timestamp_now(now: Optional[float] = None) -> str:
+    """
+    Return a naive UTC time in ISO format, exactly as datetime.utcnow().isoformat()
+    formats it (microseconds included), without the deprecated utcnow().
+    
+    Args:
+        now (Optional[float]): POSIX time to format; defaults to the current time
+        
+    Returns:
+        str: UTC time, e.g. "2024-01-01T12:00:00.123456"
+    """
+    return datetime.fromtimestamp(
+        time.time() if now is None else now, timezone.utc
+    ).replace(tzinfo=None).isoformat()
+
+
+async def _sse_with_keepalive(events: AsyncIterator[Any], interval: float = _SSE_PING_INTERVAL) -> AsyncIterator[bytes]:
+    """
+    Relay an async SSE event stream as bytes, sending a ping comment when idle.
+    
+    The pending event is awaited as a task, so a ping never cancels the
+    source generator mid-await. Closing the relay closes the source.
+    
+    Args:
+        events (AsyncIterator[Any]): Source stream yielding str or bytes frames
+        interval (float): Seconds without an event before a ping is sent
+        
+    Yields:
+        bytes: Encoded SSE frames and keep-alive pings
+    """
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(events))
+            done, _ = await asyncio.wait((pending,), timeout=interval)
+            if not done:
+                yield _SSE_PING
+                continue
+            current, pending = pending, None
+            try:
+                event = current.result()
+            except StopAsyncIteration:
+                return
+            yield event.encode("utf-8") if isinstance(event, str) else event
+    finally:
+        if pending is not None:
+            pending.cancel()
+            with suppress(BaseException):
+                await pending
+        await events.aclose()
+
+
+def _put_latest(queue: asyncio.Queue, item: Any) -> None:
+    """
+    Enqueue an item without blocking, dropping the oldest queued item when full.
+    
+    Progress frames supersede each other, so a slow SSE client skips stale
+    updates instead of the stream buffering without limit or stalling the search.
+    
+    Args:
+        queue (asyncio.Queue): Bounded queue of a single stream
+        item (Any): Frame (or end-of-stream sentinel) to enqueue
+    """
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+
+async def _start_quota_checked_search(
+    start_search: Callable[[], Awaitable[FinalAnswer]],
+    authorization: Optional[str]
+) -> Tuple["asyncio.Task[FinalAnswer]", Dict[str, Any]]:
+    """
+    Check the user's quota and start the search.
+    
+    OPTIMIZED: When the quota is already known to allow the search (recently
+    resolved token with searches to spare), the quota round-trip overlaps the
+    start of the search and a surprise denial (HTTP 429) cancels it. Anonymous,
+    unknown and nearly exhausted users are checked first, so no LLM work is
+    spent on a search that will be refused.
+    
+    Args:
+        start_search (Callable[[], Awaitable[FinalAnswer]]): Creates the search coroutine
+        authorization (Optional[str]): Bearer token from the request
+        
+    Returns:
+        Tuple[asyncio.Task[FinalAnswer], Dict[str, Any]]: The running search
+        task and the quota information
+        
+    Raises:
+        HTTPException: If the quota check fails (no search runs)
+    """
+    if not quota_known_to_allow(authorization):
+        quota_info = await check_user_quota(authorization)
+        return asyncio.ensure_future(start_search()), quota_info
+    
+    search_task = asyncio.ensure_future(start_search())
+    try:
+        quota_info = await check_user_quota(authorization)
+    except BaseException:
+        search_task.cancel()
+        raise
+    return search_task, quota_info
+
+
+def _count_search_after_response(background_tasks: BackgroundTasks, query: str, authorization: Optional[str]) -> None:
+    """
+    Schedule the user's search count increment to run after the response is sent.
+    
+    Args:
+        background_tasks (BackgroundTasks): Background tasks of the current request
+        query (str): The searched query (stored as preview)
+        authorization (Optional[str]): Bearer token from the request
+    """
+    background_tasks.add_task(
+        increment_user_search,
+        search_id=str(uuid.uuid4()),
+        query_preview=query,
+        authorization=authorization
+    )
+
+
+def _quota_headers_after_search(quota_info: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Build quota headers for a response whose search is counted in the background.
+    
+    Args:
+        quota_info (Dict[str, Any]): Result of check_user_quota()
+        
+    Returns:
+        Dict[str, str]: Quota headers reporting the quota after this search
+    """
+    return build_quota_headers(
+        max(0, quota_info.get('searches_remaining', 0) - 1),
+        quota_info.get('plan_type', 'free'),
+        quota_info.get('reset_date', '')
+    )
+
 # ============================================================================
 # Global Error Handlers
 # ============================================================================
@@ -302,13 +603,10 @@ async def global_exception_handler(request: Request, exc: Exception):
     """
     Global exception handler to prevent sensitive data leakage
     """
-    import logging
-    import traceback
-    
-    # Log full error server-side with stack trace
-    logger = logging.getLogger("error")
-    logger.error(
-        f"Unhandled exception: {exc}",
+    # Log full error server-side with stack trace (written out by the queue
+    # listener thread, never on the event loop)
+    logging.getLogger("error").error(
+        "Unhandled exception: %s", exc,
         exc_info=True,
         extra={
             "path": request.url.path,
@@ -320,7 +618,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     # Return sanitized error to client
     if os.getenv("ENV") == "production":
         # Production: Generic error (don't leak implementation details)
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "detail": "An internal error occurred. Please try again later.",
@@ -329,7 +627,7 @@ async def global_exception_handler(request: Request, exc: Exception):
         )
     else:
         # Development: Detailed error for debugging
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "detail": str(exc),
@@ -341,7 +639,7 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions with consistent format"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "detail": exc.detail,
@@ -360,6 +658,48 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 # Main Endpoints
 # ============================================================================
 
+# OPTIMIZED: The root payload never changes, so it is encoded once at import
+_ROOT_BODY = orjson.dumps({
+    "message": "Omnivionai API",
+    "version": "1.0.0",
+    "performance": {
+        "redis_cache": "disabled",  # REDIS DISABLED - Redis caching is currently disabled
+        "async": "enabled",
+        "streaming": "enabled"
+    },
+    "endpoints": {
+        "/search": "POST - Execute research query (standard response)",
+        "/search/{query}": "GET - Execute research query with real-time progress (Server-Sent Events)",
+        "/search/sync/{query}": "GET - Execute research query without streaming (fallback)",
+        "/search/markdown/{query}": "GET - Execute research query and return only the markdown paper",
+        "/health": "GET - Health check",
+        "/metrics": "GET - Performance metrics"
+    }
+})
+
+# Encoded /health body and the wall-clock second it was built for
+_health_cache: Tuple[int, bytes] = (0, b"")
+
+
+def _health_body() -> bytes:
+    """
+    Return the encoded health payload, rebuilt at most once per second.
+    
+    Returns:
+        bytes: JSON health status with a timestamp of second resolution
+    """
+    global _health_cache
+    now = int(time.time())
+    if _health_cache[0] != now:
+        # REDIS DISABLED - Redis is currently disabled
+        _health_cache = (now, orjson.dumps({
+            "status": "healthy",
+            "timestamp": _utc_timestamp_now(now),
+            "redis": "disabled"
+        }))
+    return _health_cache[1]
+
+
 @app.get("/")
 @app.head("/")
 async def root():
@@ -367,45 +707,26 @@ async def root():
     Root endpoint providing API information and available endpoints.
     
     Returns:
-        Dict: API metadata including version and endpoint descriptions
+        Response: API metadata including version and endpoint descriptions
     """
-    # REDIS DISABLED
-    redis_status = "disabled"  # Redis caching is currently disabled
-    
-    return {
-        "message": "Omnivionai API",
-        "version": "1.0.0",
-        "performance": {
-            "redis_cache": redis_status,
-            "async": "enabled",
-            "streaming": "enabled"
-        },
-        "endpoints": {
-            "/search": "POST - Execute research query (standard response)",
-            "/search/{query}": "GET - Execute research query with real-time progress (Server-Sent Events)",
-            "/search/sync/{query}": "GET - Execute research query without streaming (fallback)",
-            "/health": "GET - Health check",
-            "/metrics": "GET - Performance metrics"
-        }
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
-@app.get("/health")
-@app.head("/health")
+# Probe-only route: kept out of the OpenAPI schema. Requests are normally
+# answered by HealthCheckFastPath; the route keeps the handler reachable if
+# the middleware is removed.
+@app.get("/health", include_in_schema=False)
+@app.head("/health", include_in_schema=False)
 async def health_check():
     """
     Health check endpoint for monitoring and load balancers.
     
+    OPTIMIZED: Load balancers poll this constantly; the payload is cached per
+    second instead of building and serializing a dict on every call.
+    
     Returns:
-        Dict: Health status
+        Response: Health status
     """
-    # REDIS DISABLED
-    redis_healthy = False  # Redis is currently disabled
-    
-    return {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "redis": "disabled" if not redis_healthy else "healthy"
-    }
+    return Response(content=_health_body(), media_type="application/json")
 
 @app.get("/metrics")
 async def get_metrics():
@@ -417,7 +738,7 @@ async def get_metrics():
     """
     return {
         "performance_stats": perf_monitor.get_all_stats(),
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": _utc_timestamp_now()
     }
 
 
@@ -428,7 +749,8 @@ async def get_metrics():
 async def get_history(
     req: Request,
     limit: int = 20,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ):
     """
     Get search history for the authenticated user.
@@ -444,12 +766,16 @@ async def get_history(
     Args:
         req: FastAPI Request object
         limit: Number of results to return (max 100)
-        offset: Pagination offset
+        offset: Pagination offset (ignored when cursor is given)
+        cursor: Value of the previous page's X-Next-Cursor header. Cursor
+            pagination stays fast at any depth; deep offsets do not.
         
     Returns:
-        Dict containing paginated history
+        Dict containing paginated history; when a full page is returned the
+        X-Next-Cursor header holds the cursor for the next page
         
     Raises:
+        HTTPException 400: If the cursor is malformed
         HTTPException 401: If user is not authenticated
         HTTPException 429: Rate limited
     """
@@ -461,9 +787,16 @@ async def get_history(
     offset = max(0, offset)  # Non-negative
     
     # Get history from backend service
-    history_data = await get_search_history(user_id, limit, offset)
+    try:
+        history_data = await get_search_history(user_id, limit, offset, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = None
+    if len(history_data) == limit:
+        headers = {"X-Next-Cursor": HistoryService.history_cursor(history_data[-1])}
     
-    return JSONResponse(content=history_data)
+    return ORJSONResponse(content=history_data, headers=headers)
 
 
 @app.delete("/history/{search_id}")
@@ -503,7 +836,7 @@ async def delete_history(
     # Delete history item
     result = await delete_search_history_item(user_id, search_id)
     
-    return JSONResponse(content=result)
+    return ORJSONResponse(content=result)
 
 
 @app.delete("/history")
@@ -536,7 +869,7 @@ async def clear_history(
     # Clear all history
     result = await clear_all_history(user_id)
     
-    return JSONResponse(content=result)
+    return ORJSONResponse(content=result)
 
 @app.get("/test-search/{query}")
 async def test_search(query: str):
@@ -631,7 +964,9 @@ async def backend_authoritative_search(
         Complete search results with quota info
         
     Raises:
+        HTTPException 400: Query empty or fails sanitization
         HTTPException 401: Not authenticated
+        HTTPException 422: Query longer than MAX_QUERY_LENGTH characters
         HTTPException 429: Quota exceeded or rate limited
         HTTPException 500: Search failed
     """
@@ -641,48 +976,41 @@ async def backend_authoritative_search(
         # Extract user_id from request state (set by @require_auth)
         user_id = req.state.user_id
         
-        # Sanitize and validate query
-        if not request.query or not request.query.strip():
-            raise HTTPException(status_code=400, detail="Query cannot be empty")
-        
-        # Sanitize query (prevent XSS, SQL injection)
-        query = InputSanitizer.sanitize_search_query(request.query.strip())
-        
-        if not query:
-            raise HTTPException(status_code=400, detail="Invalid query after sanitization")
+        # Sanitize query once (prevent XSS, SQL injection; empty queries get 400);
+        # SearchRequest already stripped it and enforced MAX_QUERY_LENGTH
+        query = InputSanitizer.sanitize_query(request.query)
         
         # Log successful authentication
         security_logger.log_auth_success(user_id, req)
         
-        print(f"🔍 Backend-authoritative search: {query} (user: {user_id})")
+        # OPTIMIZED: Per-request logging goes through the queue-backed logger so
+        # stdout writes never run on the event loop
+        logger.info("Backend-authoritative search: %s (user: %s)", query, user_id)
         
         # REDIS DISABLED - Cache checking commented out
         # # Check Redis cache for duplicate query
         # redis_cache = get_redis_cache()
-        # query_hash = hash_query(query)
+        # query_hash = hash_query(normalize_query(query))
         # 
-        # if redis_cache and redis_cache.enabled:
-        #     cached_result = await redis_cache.get_search_result(query_hash)
-        #     if cached_result:
+        # if redis_cache:
+        #     cached_body = await redis_cache.get_search_result(query_hash)
+        #     if cached_body:
         #         print(f"✅ Cache HIT - returning cached result")
         #         
         #         # Track cache hit performance
         #         duration = time.time() - start_time
         #         await perf_monitor.track("search_cache_hit", duration)
         #         
-        #         return JSONResponse(content=cached_result)
-        
-        query_hash = hash_query(query)  # Still need hash for metadata
+        #         # OPTIMIZED: Cached bytes are already JSON; skip re-serializing
+        #         return Response(content=cached_body, media_type="application/json")
         
-        # Get user's plan type for token limits
-        from subscription_middleware import supabase as sub_supabase
-        sub_result = sub_supabase.table('user_subscriptions') \
-            .select('plan_type') \
-            .eq('user_id', user_id) \
-            .single() \
-            .execute()
+        # OPTIMIZED: Hash the normalized query so re-typed variants ("What is RAG?",
+        # "what is rag") share one cache key; the original query is still searched
+        query_hash = hash_query(normalize_query(query))  # Still need hash for metadata
         
-        plan_type = sub_result.data.get('plan_type', 'free') if sub_result.data else 'free'
+        # OPTIMIZED: Get user's plan type for token limits from the per-user cache
+        # instead of a blocking Supabase round-trip on every request
+        plan_type = await quota_service.get_plan_type(user_id)
         
         # Execute backend-authoritative search lifecycle with idempotent agents
         result = await search_service.execute_search(
@@ -691,16 +1019,16 @@ async def backend_authoritative_search(
             plan_type=plan_type,  # For token usage limits
             metadata={
                 "endpoint": "/api/search",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": _utc_timestamp_now(),
                 "query_hash": query_hash
             }
         )
         
-        print(f"✅ Search completed: {result['search_id']}")
+        logger.info("Search completed: %s", result['search_id'])
         
         # REDIS DISABLED - Cache storage commented out
         # # Cache the result
-        # if redis_cache and redis_cache.enabled and result.get('status') == 'success':
+        # if redis_cache and result.get('status') == 'success':
         #     await redis_cache.cache_search_result(
         #         query_hash,
         #         result,
@@ -710,23 +1038,24 @@ async def backend_authoritative_search(
         # Track performance
         duration = time.time() - start_time
         await perf_monitor.track("search_execution", duration)
-        print(f"⏱️  Search duration: {duration:.2f}s")
+        logger.debug("Search duration: %.2fs", duration)
         
-        return JSONResponse(
+        return ORJSONResponse(
             content=result,
-            headers=get_quota_headers({
-                "searches_remaining": result['quota']['searches_remaining'],
-                "plan_type": result['quota']['plan_type'],
-                "reset_date": ""  # TODO: Add from subscription
-            })
+            # OPTIMIZED: Headers come from values this request already holds (the
+            # cached plan type and the quota returned by the atomic decrement)
+            # instead of another quota read
+            headers=build_quota_headers(
+                result['quota_remaining'],
+                plan_type,
+                ""  # TODO: Add reset date from subscription
+            )
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Search error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Backend-authoritative search failed")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
@@ -766,11 +1095,11 @@ async def backend_authoritative_search_stream(
         # Extract and validate user from JWT
         user_id = await extract_user_from_token(authorization)
         
-        if not query or not query.strip():
+        query = query.strip()
+        if not query:
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
-        query = query.strip()
-        print(f"🔍 Streaming search: {query} (user: {user_id})")
+        logger.info("Streaming search: %s (user: %s)", query, user_id)
         
         # Stream search progress
         async def event_generator():
@@ -778,23 +1107,21 @@ async def backend_authoritative_search_stream(
                 async for event in search_service.stream_search_progress(user_id, query):
                     yield event
             except Exception as e:
-                error_event = f"data: {json.dumps({'event': 'error', 'message': str(e)})}\n\n"
-                yield error_event
+                yield _SSE_PREFIX + orjson.dumps({"event": "error", "message": str(e)}) + _SSE_SUFFIX
         
+        # OPTIMIZED: Frames go out as bytes straight from async generators, with a
+        # ping comment keeping idle connections open through proxies; identity
+        # encoding keeps compression middleware from buffering the stream
         return StreamingResponse(
-            event_generator(),
+            _sse_with_keepalive(event_generator()),
             media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no"
-            }
+            headers=_API_SSE_HEADERS
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Streaming error: {str(e)}")
+        logger.exception("Streaming search failed")
         raise HTTPException(status_code=500, detail=f"Streaming failed: {str(e)}")
 
 
@@ -825,16 +1152,17 @@ async def get_quota_status(
     """
     user_id = req.state.user_id
     quota_status = await quota_service.get_quota_status(user_id)
-    return JSONResponse(content=quota_status)
+    return ORJSONResponse(content=quota_status)
 
 
 # ============================================================================
 # LEGACY SEARCH ENDPOINTS (Deprecated - use /api/search instead)
 # ============================================================================
 
-@app.post("/search", response_model=SearchResponse)
+@app.post("/search", responses={200: {"model": SearchResponse}})
 async def search_research_paper(
     request: SearchRequest,
+    background_tasks: BackgroundTasks,
     authorization: Optional[str] = Header(None)
 ):
     """
@@ -856,7 +1184,8 @@ async def search_research_paper(
         SearchResponse: Complete search result with answer, citations, and markdown content
         
     Raises:
-        HTTPException 400: If query is empty or fails validation
+        HTTPException 400: If query is empty or fails content validation
+        HTTPException 422: If query is longer than MAX_QUERY_LENGTH characters
         HTTPException 429: If user has exceeded search quota
         HTTPException 500: If research process encounters an error
         
@@ -868,12 +1197,16 @@ async def search_research_paper(
         }
         ```
     """
-    try:
-        if not request.query or not request.query.strip():
-            raise HTTPException(status_code=400, detail="Query cannot be empty")
+    # SearchRequest already stripped and length-checked the query; checked
+    # outside the try so the 400 isn't turned into a 500 below
+    query = request.query
+    if not query:
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
 
-        print(f"🔍 Received search request: {request.query.strip()}")
-        print(f"🎯 Search mode: {request.search_mode}")
+    try:
+        # OPTIMIZED: Logged lazily through the queue-backed logger (no stdout
+        # write or eager f-string formatting on the request path)
+        logger.info("Received search request: %s (mode=%s)", query, request.search_mode)
         
         # REDIS DISABLED - Cache checking commented out
         # # Check cache first (before quota check for cached results)
@@ -883,7 +1216,7 @@ async def search_research_paper(
         # cached_result = await redis_cache.get(cache_key)
         # if cached_result:
         #     print(f"✅ Cache HIT - returning cached result (no quota deduction)")
-        #     return JSONResponse(
+        #     return ORJSONResponse(
         #         content=cached_result,
         #         headers={
         #             "X-Cache": "HIT",
@@ -891,46 +1224,30 @@ async def search_research_paper(
         #         }
         #     )
         
-        cache_key = f"search:{hash_query(normalize_query(request.query))}:{request.search_mode}"
-        print(f"⚠️ Cache MISS - executing search (Redis disabled)")
-        
-        # Check user quota before processing
-        quota_info = await check_user_quota(authorization)
-        print(f"✅ Quota check passed: {quota_info.get('searches_remaining', 0)} searches remaining")
-        
-        # Generate unique search ID
-        search_id = str(uuid.uuid4())
+        search_task, quota_info = await _start_quota_checked_search(
+            lambda: asyncio.wait_for(
+                orchestrator.search(query, search_mode=request.search_mode),
+                timeout=120.0  # 2 minute timeout
+            ),
+            authorization
+        )
+        logger.debug("Quota check passed: %s searches remaining", quota_info.get('searches_remaining', 0))
         
-        # Execute the search with search mode and timeout protection
+        # Wait for the search with timeout protection
         try:
-            result: FinalAnswer = await asyncio.wait_for(
-                orchestrator.search(request.query.strip(), search_mode=request.search_mode),
-                timeout=120.0  # 2 minute timeout
-            )
+            result: FinalAnswer = await search_task
         except asyncio.TimeoutError:
             raise HTTPException(status_code=408, detail="Search timeout - query took too long to process")
 
-        print(f"✅ Search completed with {len(result.citations)} citations")
+        logger.info("Search completed with %d citations", len(result.citations))
         
-        # Increment search count after successful search
-        increment_result = await increment_user_search(
-            search_id=search_id,
-            query_preview=request.query.strip(),
-            authorization=authorization
-        )
-        print(f"📊 Search count updated: {increment_result.get('searches_used', 0)} used, {increment_result.get('searches_remaining', 0)} remaining")
-
-        # Optimize: Use Pydantic's built-in serialization instead of dataclasses.asdict
-        # Convert to dict only for caching, not for response
-        citations_data = [dataclasses.asdict(citation) for citation in result.citations]
-
-        # Create response with quota information
-        response_dict = {
-            "answer": result.answer,
-            "citations": citations_data,
-            "confidence_score": result.confidence_score,
-            "markdown_content": result.answer  # Use answer field which has images injected
-        }
+        # OPTIMIZED: Increment the search count after the response is sent instead
+        # of holding the response for another database round-trip
+        _count_search_after_response(background_tasks, query, authorization)
+
+        # OPTIMIZED: orjson serializes the citation dataclasses directly, so the
+        # payload is encoded in one pass (no asdict copies, no pydantic revalidation)
+        response_dict = _search_payload(result)
         
         # REDIS DISABLED - Cache storage commented out
         # # Cache the successful result (1 hour TTL)
@@ -938,28 +1255,23 @@ async def search_research_paper(
         # print(f"✅ Result cached with key: {cache_key[:30]}...")
         
         # Return response with quota headers
-        return JSONResponse(
+        return ORJSONResponse(
             content=response_dict,
-            headers=get_quota_headers({
-                "searches_remaining": increment_result.get('searches_remaining', 0),
-                "plan_type": quota_info.get('plan_type', 'free'),
-                "reset_date": quota_info.get('reset_date', '')
-            })
+            headers=_quota_headers_after_search(quota_info)
         )
 
     except ValueError as e:
         # Handle validation errors (invalid query)
-        print(f"⚠️ Invalid query: {str(e)}")
+        logger.warning("Invalid query: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"❌ Search error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Search failed (mode=%s)", request.search_mode)
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 @app.get("/search/{query}")
 async def search_research_paper_get(
     query: str,
+    background_tasks: BackgroundTasks,
     search_mode: str = "deep",
     authorization: Optional[str] = Header(None)
 ):
@@ -1009,128 +1321,115 @@ async def search_research_paper_get(
         data: {"type":"result","result":{"answer":"...","citations":[...],...}}
         ```
     """
-    if not query or not query.strip():
+    query = query.strip()
+    if not query:
         raise HTTPException(status_code=400, detail="Query cannot be empty")
     
-    print(f"🔍 Received streaming search request: {query.strip()}")
-    print(f"🎯 Search mode: {search_mode}")
-    
-    # Check user quota before processing
+    logger.info("Received streaming search request: %s (mode=%s)", query, search_mode)
+    
+    # OPTIMIZED: Bounded queue for progress updates so a slow client cannot make
+    # the stream buffer without limit
+    progress_queue = asyncio.Queue(maxsize=_SSE_QUEUE_SIZE)
+    # Last update sent for each step, used to drop repeated identical updates
+    last_updates: Dict[str, tuple] = {}
+    
+    # Modified progress callback that puts data in queue
+    async def queued_progress_callback(step: str, status: str, details: str, progress: float, search_queries=None, sites_visited=None, sources_found=None):
+        update = (status, details, progress, search_queries, sites_visited, sources_found)
+        if last_updates.get(step) == update:
+            return
+        last_updates[step] = update
+        # OPTIMIZED: Per-event logging stays at debug level (off by default)
+        logger.debug("Progress: %s - %s - %s (%s%%)", step, status, details, progress)
+        
+        _put_latest(progress_queue, _sse_frame(
+            "progress",
+            progress={
+                "step": step,
+                "status": status,
+                "details": details,
+                "timestamp": _progress_timestamp_now(),
+                "progress_percentage": float(progress),
+                "search_queries": search_queries,
+                "sites_visited": sites_visited,
+                "sources_found": sources_found
+            }
+        ))
+
+    # The quota check runs before the stream opens so a denial can return HTTP 429
     try:
         quota_info = await check_user_quota(authorization)
-        print(f"✅ Quota check passed: {quota_info.get('searches_remaining', 0)} searches remaining")
-    except HTTPException as e:
-        print(f"❌ Quota check failed: {e.detail}")
+        logger.debug("Quota check passed: %s searches remaining", quota_info.get('searches_remaining', 0))
+    except BaseException as e:
+        logger.info("Quota check failed: %s", getattr(e, 'detail', e))
         raise
 
     async def generate_search_stream():
+        # The search starts only once Starlette iterates the stream, so the
+        # finally below always owns the task and can cancel it
+        search_task = asyncio.ensure_future(
+            orchestrator.search(query, queued_progress_callback, search_mode=search_mode)
+        )
+        # OPTIMIZED: The sentinel is queued after the last progress update, even
+        # if the search fails, so the stream loop never has to poll
+        search_task.add_done_callback(lambda _: _put_latest(progress_queue, _STREAM_DONE))
         try:
-            print(f"🚀 Starting search stream for: {query.strip()}")
-            
-            # Create a queue for progress updates
-            progress_queue = asyncio.Queue()
-            
-            # Modified progress callback that puts data in queue
-            async def queued_progress_callback(step: str, status: str, details: str, progress: float, search_queries=None, sites_visited=None, sources_found=None):
-                print(f"📈 Progress: {step} - {status} - {details} ({progress}%)")
-                
-                progress_update = ProgressUpdate(
-                    step=step,
-                    status=status,
-                    details=details,
-                    timestamp=datetime.now().isoformat(),
-                    progress_percentage=progress,
-                    search_queries=search_queries,
-                    sites_visited=sites_visited,
-                    sources_found=sources_found
-                )
-                
-                response = StreamingSearchResponse(
-                    type="progress",
-                    progress=progress_update
-                )
-                
-                await progress_queue.put(f"data: {response.model_dump_json()}\n\n")
-
-            # Start the search in a separate task with search mode
-            search_task = asyncio.create_task(orchestrator.search(query.strip(), queued_progress_callback, search_mode=search_mode))
-            
             # Yield progress updates as they come
-            while not search_task.done():
-                try:
-                    # Wait for progress update with timeout
-                    progress_data = await asyncio.wait_for(progress_queue.get(), timeout=0.1)
-                    yield progress_data
-                except asyncio.TimeoutError:
-                    continue
-            
-            # Get any remaining progress updates
-            while not progress_queue.empty():
-                try:
-                    progress_data = await asyncio.wait_for(progress_queue.get(), timeout=0.1)
-                    yield progress_data
-                except asyncio.TimeoutError:
+            # OPTIMIZED: Frames that queued up while the previous chunk was being
+            # written go out together as one chunk (one send per burst rather than
+            # per event); nothing waits on a timer, so latency is unchanged
+            while True:
+                progress_data = await progress_queue.get()
+                if progress_data is _STREAM_DONE:
+                    break
+                chunk = [progress_data]
+                chunk_size = len(progress_data)
+                while chunk_size < _SSE_COALESCE_BYTES and not progress_queue.empty():
+                    progress_data = progress_queue.get_nowait()
+                    if progress_data is _STREAM_DONE:
+                        break
+                    chunk.append(progress_data)
+                    chunk_size += len(progress_data)
+                yield chunk[0] if len(chunk) == 1 else b"".join(chunk)
+                if progress_data is _STREAM_DONE:
                     break
             
             # Get the final result
             result: FinalAnswer = await search_task
             
-            print(f"✅ Search completed with {len(result.citations)} citations")
+            logger.info("Search completed with %d citations", len(result.citations))
             
-            # Generate unique search ID and increment search count
-            search_id = str(uuid.uuid4())
-            increment_result = await increment_user_search(
-                search_id=search_id,
-                query_preview=query.strip(),
-                authorization=authorization
-            )
-            print(f"📊 Search count updated: {increment_result.get('searches_used', 0)} used, {increment_result.get('searches_remaining', 0)} remaining")
-
-            # Convert citations to dict format for JSON response (optimized)
-            citations_data = [dataclasses.asdict(citation) for citation in result.citations]
-
-            # Send final result
-            final_response = SearchResponse(
-                answer=result.answer,
-                citations=citations_data,
-                confidence_score=result.confidence_score,
-                markdown_content=result.answer  # Use answer field which has images injected
-            )
-            
-            response = StreamingSearchResponse(
-                type="result",
-                result=final_response
-            )
+            # OPTIMIZED: Count the search in a background task that runs after the
+            # stream has been closed, so the database round-trip delays neither the
+            # final event nor the end of the response
+            _count_search_after_response(background_tasks, query, authorization)
             
-            yield f"data: {response.model_dump_json()}\n\n"
+            # Send final result
+            yield _sse_frame("result", result=_search_payload(result))
 
         except ValueError as e:
             # Send validation error as final message
-            error_response = StreamingSearchResponse(
-                type="error",
-                data={"error": str(e), "validation_error": True}
-            )
-            yield f"data: {error_response.model_dump_json()}\n\n"
+            yield _sse_frame("error", data={"error": str(e), "validation_error": True})
         except Exception as e:
             # Send error as final message
-            error_response = StreamingSearchResponse(
-                type="error",
-                data={"error": f"Search failed: {str(e)}"}
-            )
-            yield f"data: {error_response.model_dump_json()}\n\n"
-
+            yield _sse_frame("error", data={"error": f"Search failed: {str(e)}"})
+        finally:
+            # OPTIMIZED: Starlette cancels and closes this generator when the client
+            # disconnects; stop the search instead of paying for LLM and scraping
+            # work nobody will read
+            if not search_task.done():
+                search_task.cancel()
+                logger.info("Client disconnected, search cancelled: %s", query)
+
+    # OPTIMIZED: Same relay as /api/search/stream: pre-encoded frames plus idle
+    # pings, so proxies keep the connection open during long research steps
     return StreamingResponse(
-        generate_search_stream(),
+        _sse_with_keepalive(generate_search_stream()),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Cache-Control",
-        }
+        headers=_SEARCH_SSE_HEADERS
     )
 
-@app.get("/search/sync/{query}", response_model=SearchResponse)
+@app.get("/search/sync/{query}", responses={200: {"model": SearchResponse}})
 async def search_research_paper_sync(query: str, search_mode: str = "deep"):
     """
     Execute AI Deep Search via GET request without streaming (compatibility endpoint).
@@ -1165,33 +1464,94 @@ async def search_research_paper_sync(query: str, search_mode: str = "deep"):
         ```
     """
     try:
-        if not query or not query.strip():
+        query = query.strip()
+        if not query:
             raise HTTPException(status_code=400, detail="Query cannot be empty")
 
         # Execute the search without progress callback with search mode
-        result: FinalAnswer = await orchestrator.search(query.strip(), search_mode=search_mode)
+        result: FinalAnswer = await orchestrator.search(query, search_mode=search_mode)
 
-        # Convert citations to dict format for JSON response (optimized)
-        citations_data = [dataclasses.asdict(citation) for citation in result.citations]
+        # OPTIMIZED: Encode the result directly with orjson; SearchResponse is
+        # declared schema-only (responses=), so there is no runtime validation
+        return ORJSONResponse(content=_search_payload(result))
 
-        return SearchResponse(
-            answer=result.answer,
-            citations=citations_data,
-            confidence_score=result.confidence_score,
-            markdown_content=result.answer  # Use answer field which has images injected
-        )
+    except ValueError as e:
+        # Handle validation errors (invalid query)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+@app.get("/search/markdown/{query}")
+async def search_research_paper_markdown(
+    query: str,
+    background_tasks: BackgroundTasks,
+    search_mode: str = "deep",
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Execute AI Deep Search and return only the research paper as markdown.
+    
+    OPTIMIZED: The paper is sent as a text/markdown body instead of being
+    JSON-escaped (twice, as "answer" and "markdown_content") inside a
+    SearchResponse, so clients that only render the paper download and parse
+    far fewer bytes. Large bodies are gzip-compressed by GZipMiddleware.
+    
+    **Quota Enforcement**: Counts against the same quota as POST /search.
+    
+    Args:
+        query (str): The research query (URL encoded in path)
+        background_tasks (BackgroundTasks): Runs the search count update after the response
+        search_mode (str): Search mode - "deep", "moderate", "quick", or "sla". Default is "deep"
+        authorization (Optional[str]): Bearer token for authentication
+        
+    Returns:
+        PlainTextResponse: The markdown research paper (media type text/markdown)
+        
+    Raises:
+        HTTPException 400: If query is empty or fails validation
+        HTTPException 429: If user has exceeded search quota
+        HTTPException 500: If research process encounters an error
+    """
+    query = query.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
 
+    search_task, quota_info = await _start_quota_checked_search(
+        lambda: orchestrator.search(query, search_mode=search_mode),
+        authorization
+    )
+
+    try:
+        result: FinalAnswer = await search_task
     except ValueError as e:
         # Handle validation errors (invalid query)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+    _count_search_after_response(background_tasks, query, authorization)
+
+    return PlainTextResponse(
+        content=result.answer,  # Use answer field which has images injected
+        media_type="text/markdown",
+        headers=_quota_headers_after_search(quota_info)
+    )
+
 if __name__ == "__main__":
+    # OPTIMIZED: uvloop and httptools (installed by uvicorn[standard]) give a
+    # faster event loop and HTTP parser for this I/O-bound API; uvloop is POSIX
+    # only, so Windows keeps the stdlib asyncio loop
+    # Auto-reload (single process) only in development; otherwise run one
+    # worker per core (override with WEB_CONCURRENCY) without access logs
+    dev_mode = os.getenv("ENV") == "development"
     uvicorn.run(
         "app:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        reload=dev_mode,
+        workers=None if dev_mode else int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        access_log=dev_mode
     )
 
@@ -3,8 +3,10 @@ Authentication Utilities - JWT validation and user verification
 """
 
 import os
+import time
+import hashlib
 import jwt
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from functools import wraps
 from fastapi import Request, HTTPException
 import logging
@@ -16,11 +18,26 @@ SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
 if not SUPABASE_JWT_SECRET:
     raise ValueError("SUPABASE_JWT_SECRET must be set")
 
+# Seconds a verified token payload is reused without re-verifying it; kept short
+# so the cache adds little to how long a token stays usable after sign-out
+JWT_CACHE_TTL = 10
+# Maximum number of verified tokens cached in this process
+JWT_CACHE_SIZE = 10000
+# Cached payloads stop being served this many seconds before "exp"
+JWT_EXPIRY_LEEWAY = 5
+
+# blake2b(token) -> (valid_until, payload); digests avoid retaining raw tokens
+_jwt_cache: Dict[bytes, Tuple[float, Dict[str, Any]]] = {}
+
 
 def verify_jwt_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Verify JWT token from Supabase Auth
     
+    OPTIMIZED: Verified payloads are cached for JWT_CACHE_TTL seconds (never
+    past the token's own expiry), so repeat requests with the same token skip
+    the HMAC check and claim parsing.
+    
     Args:
         token: JWT token string
         
@@ -32,6 +49,14 @@ def verify_jwt_token(token: str) -> Optional[Dict[str, Any]]:
         if token.startswith("Bearer "):
             token = token[7:]
         
+        cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        now = time.time()
+        entry = _jwt_cache.get(cache_key)
+        if entry is not None:
+            if now < entry[0]:
+                return entry[1]
+            _jwt_cache.pop(cache_key, None)
+        
         # Decode and verify token
         payload = jwt.decode(
             token,
@@ -40,6 +65,15 @@ def verify_jwt_token(token: str) -> Optional[Dict[str, Any]]:
             audience="authenticated"
         )
         
+        valid_until = now + JWT_CACHE_TTL
+        if "exp" in payload:
+            valid_until = min(valid_until, payload["exp"] - JWT_EXPIRY_LEEWAY)
+        if valid_until > now:
+            if len(_jwt_cache) >= JWT_CACHE_SIZE:
+                # Drop the oldest insertion to keep the cache bounded
+                _jwt_cache.pop(next(iter(_jwt_cache)))
+            _jwt_cache[cache_key] = (valid_until, payload)
+        
         return payload
         
     except jwt.ExpiredSignatureError:
@@ -0,0 +1,51 @@
+"""
+History Pagination - Opaque keyset cursors for search history pages
+Pure helpers with no database dependency
+"""
+
+import base64
+import binascii
+import uuid
+from typing import Dict, Any, Tuple
+from datetime import datetime
+
+
+def history_cursor(row: Dict[str, Any]) -> str:
+    """
+    Build the opaque keyset cursor that continues after a history row
+    
+    Args:
+        row: History record as returned by HistoryService.get_search_history()
+        
+    Returns:
+        URL-safe base64 of "<created_at>|<id>" (unpadded, so it needs no
+        escaping in a query string)
+    """
+    raw = f"{row['created_at']}|{row['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def parse_history_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decode and validate a cursor built by history_cursor()
+    
+    Both parts are parsed into typed values, so only canonical timestamps
+    and UUIDs ever reach the PostgREST filter.
+    
+    Args:
+        cursor: Cursor supplied by the client
+        
+    Returns:
+        Tuple of (created_at, id) of the last row of the previous page
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, separator, last_id = raw.partition("|")
+        if not separator:
+            raise ValueError("missing separator")
+        return datetime.fromisoformat(created_at), uuid.UUID(last_id)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError("Invalid history cursor") from e
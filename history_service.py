@@ -4,9 +4,11 @@ All history operations go through backend only
 """
 
 import os
+import asyncio
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
 from supabase import create_client, Client
+from history_pagination import history_cursor, parse_history_cursor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -53,9 +55,10 @@ class HistoryService:
                 "created_at": datetime.now(timezone.utc).isoformat()
             }
             
-            result = supabase.table("encrypted_search_history").insert(
-                history_data
-            ).execute()
+            # supabase-py is blocking; run the INSERT off the event loop
+            result = await asyncio.to_thread(
+                lambda: supabase.table("encrypted_search_history").insert(history_data).execute()
+            )
             
             logger.info(f"Search history saved for user {user_id}")
             
@@ -69,29 +72,59 @@ class HistoryService:
             logger.error(f"Error saving search history: {str(e)}")
             raise
     
+    # Cursor helpers live in history_pagination (no Supabase dependency)
+    history_cursor = staticmethod(history_cursor)
+    parse_history_cursor = staticmethod(parse_history_cursor)
+    
     @staticmethod
     async def get_search_history(
         user_id: str,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
-        Get search history for a user
+        Get search history for a user, newest first
+        
+        OPTIMIZED: With a cursor the page is found by keyset on (created_at, id)
+        and read straight from the index position, whereas OFFSET makes Postgres
+        read and discard every skipped row, so deep pages get linearly slower.
+        Offset pagination is kept for existing callers.
         
         Args:
             user_id: User UUID
             limit: Maximum number of results
-            offset: Offset for pagination
+            offset: Offset for pagination (ignored when cursor is given)
+            cursor: history_cursor() of the last row of the previous page
             
         Returns:
             List of search history records
+            
+        Raises:
+            ValueError: If the cursor is malformed
         """
+        # Validated before the query is built; a bad cursor is a client error
+        after = HistoryService.parse_history_cursor(cursor) if cursor else None
+        
         try:
-            result = supabase.table("encrypted_search_history").select(
+            request = supabase.table("encrypted_search_history").select(
                 "*"
-            ).eq("user_id", user_id).order(
-                "created_at", desc=True
-            ).range(offset, offset + limit - 1).execute()
+            ).eq("user_id", user_id)
+            
+            if after:
+                created_at, last_id = after[0].isoformat(), str(after[1])
+                # Rows strictly after the cursor in (created_at DESC, id DESC) order
+                request = request.or_(
+                    f'created_at.lt."{created_at}",'
+                    f'and(created_at.eq."{created_at}",id.lt."{last_id}")'
+                )
+                request = request.order("created_at", desc=True).order("id", desc=True).limit(limit)
+            else:
+                request = request.order("created_at", desc=True).order("id", desc=True).range(
+                    offset, offset + limit - 1
+                )
+            
+            result = request.execute()
             
             return result.data if result.data else []
             
@@ -194,9 +227,14 @@ async def save_search_history(user_id: str, query: str, results: Dict[str, Any],
     return await HistoryService.save_search_history(user_id, query, results, metadata)
 
 
-async def get_search_history(user_id: str, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+async def get_search_history(
+    user_id: str,
+    limit: int = 50,
+    offset: int = 0,
+    cursor: Optional[str] = None
+) -> List[Dict[str, Any]]:
     """Get search history"""
-    return await HistoryService.get_search_history(user_id, limit, offset)
+    return await HistoryService.get_search_history(user_id, limit, offset, cursor)
 
 
 async def delete_search_history_item(user_id: str, history_id: str) -> Dict[str, Any]:
@@ -0,0 +1,17 @@
+-- Migration 005: Keyset Pagination Index for Search History
+-- Supports GET /history?cursor=..., which pages with
+--   WHERE user_id = $1 AND (created_at, id) < ($2, $3)
+--   ORDER BY created_at DESC, id DESC LIMIT $4
+-- The index matches that order exactly, so each page is a single index range
+-- scan starting at the cursor instead of reading and discarding skipped rows.
+
+-- ============================================================================
+-- CREATE KEYSET PAGINATION INDEX
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_search_history_user_created_id
+ON encrypted_search_history(user_id, created_at DESC, id DESC);
+
+-- The (user_id, created_at DESC) index from migration 002 is a prefix of this
+-- one and becomes redundant; drop it once this index is in place.
+DROP INDEX IF EXISTS idx_search_history_user_created;
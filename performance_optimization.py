@@ -5,9 +5,14 @@ Performance Optimization - Redis caching, connection pooling, and background que
 import os
 import asyncio
 import json
+import queue
+import unicodedata
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timezone
 import logging
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -112,6 +117,44 @@ class RedisCache:
         await asyncio.sleep(delay)
         self.memory_cache.pop(key, None)
     
+    async def cache_search_result(
+        self,
+        query_hash: str,
+        result: Dict[str, Any],
+        ttl: int = 3600
+    ) -> bool:
+        """
+        Cache a search result as pre-serialized JSON bytes.
+
+        OPTIMIZED: The result is encoded once here so cache hits can be written
+        straight to the response body instead of being re-serialized per request.
+        """
+        key = f"search_result:{query_hash}"
+        try:
+            body = orjson.dumps(result)
+            if self.available and self.client:
+                await self.client.set(key, body, ex=ttl)
+            else:
+                self.memory_cache[key] = body
+                asyncio.create_task(self._cleanup_memory_cache(key, ttl))
+            return True
+        except Exception as e:
+            logger.error(f"Cache SET error: {str(e)}")
+            return False
+    
+    async def get_search_result(self, query_hash: str) -> Optional[bytes]:
+        """Get a cached search result as ready-to-send JSON bytes"""
+        key = f"search_result:{query_hash}"
+        try:
+            if self.available and self.client:
+                body = await self.client.get(key)
+                # The client decodes responses; hand back bytes either way
+                return body.encode() if isinstance(body, str) else body
+            return self.memory_cache.get(key)
+        except Exception as e:
+            logger.error(f"Cache GET error: {str(e)}")
+            return None
+    
     async def set_progress(
         self,
         search_id: str,
@@ -326,6 +369,52 @@ async def cleanup_performance_layer():
     logger.info("Performance layer cleaned up")
 
 
+def start_queue_logging() -> QueueListener:
+    """
+    Route root logging through a queue drained by a background thread.
+    
+    The root logger's handlers (a stderr StreamHandler if none are configured)
+    are moved behind a QueueListener, so code on the event loop thread only
+    enqueues log records while the listener thread performs the blocking
+    writes. The root level is set from LOG_LEVEL (default INFO) so the
+    request-path logger.info() calls are actually emitted.
+    
+    Returns:
+        QueueListener: The started listener; call stop() on shutdown to flush it
+    """
+    root = logging.getLogger()
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    try:
+        root.setLevel(level)
+    except ValueError:
+        root.setLevel(logging.INFO)
+        logger.warning(f"Unknown LOG_LEVEL {level!r}, using INFO")
+    
+    handlers = root.handlers[:]
+    if not handlers:
+        default_handler = logging.StreamHandler()
+        default_handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+        handlers = [default_handler]
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    return listener
+
+
+def stop_queue_logging(listener: QueueListener) -> None:
+    """
+    Flush pending records and restore the root logger's original handlers.
+    
+    Args:
+        listener (QueueListener): Listener returned by start_queue_logging()
+    """
+    listener.stop()
+    logging.getLogger().handlers = list(listener.handlers)
+
+
 # Convenience functions for easy import
 async def init_redis_cache():
     """Initialize Redis cache"""
@@ -354,5 +443,10 @@ def hash_query(query: str) -> str:
 
 
 def normalize_query(query: str) -> str:
-    """Normalize query for consistent caching"""
-    return query.strip().lower()
+    """
+    Normalize query for consistent caching.
+    
+    Applies Unicode NFKC, lower-cases, collapses whitespace and drops trailing
+    punctuation, so trivially different spellings of a query share a cache key.
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).lower().split()).rstrip("?!.,;: ")
@@ -4,7 +4,9 @@ Handles all quota checking, decrementing, and refunding operations
 """
 
 import os
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Tuple
+import httpx
 from supabase import create_client, Client
 from datetime import datetime, timezone
 import logging
@@ -20,6 +22,48 @@ if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
+# Seconds a cached plan_type stays valid (bounds staleness across workers)
+PLAN_TYPE_CACHE_TTL = 300
+# Maximum number of users whose plan_type is cached in this process
+PLAN_TYPE_CACHE_SIZE = 10000
+
+# user_id -> (cached_at, plan_type)
+_plan_type_cache: Dict[str, Tuple[float, str]] = {}
+
+# Pooled async client for hot-path PostgREST reads (created on first use)
+_rest_client: Optional[httpx.AsyncClient] = None
+
+
+def get_rest_client() -> httpx.AsyncClient:
+    """
+    Get the shared async HTTP client for the Supabase REST API
+    
+    OPTIMIZED: One keep-alive (HTTP/2) connection pool is reused for the
+    process lifetime, so hot-path reads neither block the event loop nor pay a
+    TLS handshake per call like the sync supabase-py client.
+    """
+    global _rest_client
+    if _rest_client is None:
+        _rest_client = httpx.AsyncClient(
+            base_url=f"{SUPABASE_URL}/rest/v1",
+            headers={
+                "apikey": SUPABASE_SERVICE_ROLE_KEY,
+                "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}"
+            },
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=200),
+            timeout=10.0
+        )
+    return _rest_client
+
+
+async def close_rest_client() -> None:
+    """Close the shared REST client (call on application shutdown)"""
+    global _rest_client
+    if _rest_client is not None:
+        await _rest_client.aclose()
+        _rest_client = None
+
 
 class QuotaExceededError(Exception):
     """Raised when user has exceeded their search quota"""
@@ -67,6 +111,39 @@ class QuotaService:
             logger.error(f"Error getting quota status for user {user_id}: {str(e)}")
             raise
     
+    @staticmethod
+    async def get_plan_type(user_id: str) -> str:
+        """
+        Get a user's plan type, cached in process for PLAN_TYPE_CACHE_TTL seconds
+        
+        Cache misses query the Supabase REST API through the pooled async
+        client. Subscription changes made through update_subscription() invalidate the
+        entry immediately.
+        
+        Args:
+            user_id: User UUID
+            
+        Returns:
+            Plan type ("free" when the user has no subscription record)
+        """
+        entry = _plan_type_cache.get(user_id)
+        if entry is not None and time.monotonic() - entry[0] < PLAN_TYPE_CACHE_TTL:
+            return entry[1]
+        
+        response = await get_rest_client().get(
+            "/user_subscriptions",
+            params={"user_id": f"eq.{user_id}", "select": "plan_type", "limit": "1"}
+        )
+        response.raise_for_status()
+        rows = response.json()
+        plan_type = (rows[0].get("plan_type") or "free") if rows else "free"
+        
+        if len(_plan_type_cache) >= PLAN_TYPE_CACHE_SIZE:
+            # Drop the oldest insertion to keep the cache bounded
+            _plan_type_cache.pop(next(iter(_plan_type_cache)))
+        _plan_type_cache[user_id] = (time.monotonic(), plan_type)
+        return plan_type
+    
     @staticmethod
     async def _create_default_subscription(user_id: str) -> Dict[str, Any]:
         """Create default free subscription for new user"""
@@ -218,6 +295,7 @@ class QuotaService:
                 }
                 result = supabase.table("user_subscriptions").insert(insert_data).execute()
             
+            _plan_type_cache.pop(user_id, None)
             logger.info(f"Subscription updated for user {user_id}: {plan_type} with {searches_limit} searches")
             
             return {
@@ -239,6 +317,11 @@ async def get_quota_status(user_id: str) -> Dict[str, Any]:
     return await QuotaService.get_quota_status(user_id)
 
 
+async def get_plan_type(user_id: str) -> str:
+    """Get cached plan type for a user"""
+    return await QuotaService.get_plan_type(user_id)
+
+
 async def check_and_decrement_quota(user_id: str) -> Dict[str, Any]:
     """Check and decrement quota atomically"""
     return await QuotaService.check_and_decrement_quota(user_id)
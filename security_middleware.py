@@ -80,11 +80,42 @@ class RateLimiter:
         return max(0, max_requests - len(self.requests[user_id]))
 
 
+# ✅ SECURITY FIX: Enhanced dangerous pattern detection
+_DANGEROUS_QUERY_PATTERNS = [
+    # SQL Injection
+    r";\s*DROP", r";\s*DELETE", r";\s*UPDATE", r";\s*INSERT",
+    r"UNION\s+SELECT", r"--", r"/\*", r"\*/", r"xp_", r"sp_",
+    r";\s*EXEC", r";\s*EXECUTE", r"INFORMATION_SCHEMA",
+    r";\s*ALTER", r";\s*CREATE", r";\s*TRUNCATE",
+    
+    # NoSQL Injection
+    r"\$where", r"\$ne", r"\$gt", r"\$lt", r"\$regex", r"\$nin",
+    
+    # Command Injection
+    r"`.*`", r"\$\(.*\)", r"&&", r"\|\|", r";\s*\w+",
+    
+    # Path Traversal
+    r"\.\./", r"\.\.\\", r"%2e%2e", r"%252e",
+    
+    # LDAP Injection
+    r"\(\|", r"\(&", r"\(!", r"\*\)",
+    
+    # XSS Prevention (belt and suspenders)
+    r"<script", r"javascript:", r"onerror\s*=", r"onload\s*=",
+    r"<iframe", r"<object", r"<embed",
+]
+# Compiled once at import: a single case-insensitive scan per query
+_DANGEROUS_QUERY_PATTERN = re.compile("|".join(_DANGEROUS_QUERY_PATTERNS), re.IGNORECASE)
+
+# Maximum search query length in characters (shared with the request models in app.py)
+MAX_QUERY_LENGTH = 1000
+
+
 class InputSanitizer:
     """Input sanitization to prevent injection attacks"""
     
     @staticmethod
-    def sanitize_query(query: str, max_length: int = 1000) -> str:
+    def sanitize_query(query: str, max_length: int = MAX_QUERY_LENGTH) -> str:
         """
         Sanitize search query
         
@@ -120,38 +151,13 @@ class InputSanitizer:
                 detail="Query too short (min 3 characters)"
             )
         
-        # ✅ SECURITY FIX: Enhanced dangerous pattern detection
-        dangerous_patterns = [
-            # SQL Injection
-            r";\s*DROP", r";\s*DELETE", r";\s*UPDATE", r";\s*INSERT",
-            r"UNION\s+SELECT", r"--", r"/\*", r"\*/", r"xp_", r"sp_",
-            r";\s*EXEC", r";\s*EXECUTE", r"INFORMATION_SCHEMA",
-            r";\s*ALTER", r";\s*CREATE", r";\s*TRUNCATE",
-            
-            # NoSQL Injection
-            r"\$where", r"\$ne", r"\$gt", r"\$lt", r"\$regex", r"\$nin",
-            
-            # Command Injection
-            r"`.*`", r"\$\(.*\)", r"&&", r"\|\|", r";\s*\w+",
-            
-            # Path Traversal
-            r"\.\./", r"\.\.\\", r"%2e%2e", r"%252e",
-            
-            # LDAP Injection
-            r"\(\|", r"\(&", r"\(!", r"\*\)",
-            
-            # XSS Prevention (belt and suspenders)
-            r"<script", r"javascript:", r"onerror\s*=", r"onload\s*=",
-            r"<iframe", r"<object", r"<embed",
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, query, re.IGNORECASE):
-                logger.warning(f"Suspicious query detected: {query[:100]}")
-                raise HTTPException(
-                    status_code=400,
-                    detail="Invalid query format detected"
-                )
+        # OPTIMIZED: One precompiled alternation of all dangerous patterns
+        if _DANGEROUS_QUERY_PATTERN.search(query):
+            logger.warning(f"Suspicious query detected: {query[:100]}")
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid query format detected"
+            )
         
         return query
     
@@ -256,7 +262,7 @@ def check_rate_limit(user_id: str, plan_type: str = "free") -> bool:
     return rate_limiter.check_rate_limit(user_id, plan_type)
 
 
-def sanitize_query(query: str, max_length: int = 1000) -> str:
+def sanitize_query(query: str, max_length: int = MAX_QUERY_LENGTH) -> str:
     """Sanitize search query"""
     return input_sanitizer.sanitize_query(query, max_length)
 
@@ -4,7 +4,10 @@ Handles search limit enforcement and Supabase integration
 """
 
 import os
-from typing import Optional, Dict, Any
+import asyncio
+import hashlib
+import time
+from typing import Optional, Dict, Any, Callable, Tuple, TypeVar
 from supabase import create_client, Client
 from fastapi import HTTPException, Header
 
@@ -14,6 +17,28 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
 
 supabase: Optional[Client] = None
 
+# Maximum number of supabase-py calls running in worker threads at once
+SUPABASE_MAX_CONCURRENCY = 50
+_supabase_semaphore = asyncio.Semaphore(SUPABASE_MAX_CONCURRENCY)
+
+# Seconds a token -> user_id resolution may authorize a new search before asking
+# Supabase Auth again; kept short so signed-out or revoked sessions stop working quickly
+USER_LOOKUP_CACHE_TTL = 10
+# Seconds a resolution may be reused to count a search it already authorized
+# (covers the 120 s search timeout); never used to let a new search through
+USER_LOOKUP_REUSE_TTL = 180
+# Maximum number of resolved tokens cached in this process
+USER_LOOKUP_CACHE_SIZE = 10000
+
+# blake2b(token) -> (resolved_at, user_id); digests avoid retaining raw tokens
+_user_lookup_cache: Dict[bytes, Tuple[float, str]] = {}
+
+# user_id -> (checked_at, searches_remaining) from the last successful quota check;
+# only a hint for starting work early, never a substitute for check_user_quota()
+_recent_quota: Dict[str, Tuple[float, int]] = {}
+
+T = TypeVar("T")
+
 # ✅ SECURITY FIX: Removed sensitive credential logging
 print("\n" + "="*70)
 print("🔧 SUPABASE SUBSCRIPTION MIDDLEWARE INITIALIZATION")
@@ -43,6 +68,131 @@ else:
 print("="*70 + "\n")
 
 
+async def _run_supabase(call: Callable[[], T]) -> T:
+    """
+    Run a blocking supabase-py call in a worker thread
+    
+    OPTIMIZED: supabase-py is synchronous; running it inline would stall the
+    event loop for the whole HTTPS round-trip. The semaphore caps how many
+    calls occupy the shared thread pool at once.
+    
+    Args:
+        call: Zero-argument callable performing the Supabase request
+        
+    Returns:
+        The callable's return value
+    """
+    async with _supabase_semaphore:
+        return await asyncio.to_thread(call)
+
+
+async def _get_user_id(
+    authorization: Optional[str],
+    max_age: float = USER_LOOKUP_CACHE_TTL
+) -> Optional[str]:
+    """
+    Resolve the Supabase user ID for a Bearer token
+    
+    OPTIMIZED: Both check_user_quota() and increment_user_search() need the
+    user for the same token; successful lookups are cached so a search costs
+    at most one Supabase Auth round-trip instead of two per request.
+    
+    Args:
+        authorization: Bearer token from request header
+        max_age: Seconds a cached resolution may be reused
+        
+    Returns:
+        User ID, or None for missing or unverifiable tokens
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    token = authorization.split(" ")[1]
+    
+    cached_user_id = _cached_user_id(authorization, max_age)
+    if cached_user_id is not None:
+        return cached_user_id
+    
+    try:
+        # Verify JWT and get user
+        user_response = await _run_supabase(lambda: supabase.auth.get_user(token))
+    except Exception as e:
+        print(f"⚠️ Failed to verify user token: {e}")
+        return None
+    if not (user_response and hasattr(user_response, 'user')):
+        return None
+    
+    user_id = user_response.user.id
+    if len(_user_lookup_cache) >= USER_LOOKUP_CACHE_SIZE:
+        # Drop the oldest insertion to keep the cache bounded
+        _user_lookup_cache.pop(next(iter(_user_lookup_cache)))
+    _user_lookup_cache[_token_digest(token)] = (time.monotonic(), user_id)
+    return user_id
+
+
+def _token_digest(token: str) -> bytes:
+    """Cache key for a raw token"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def _cached_user_id(
+    authorization: Optional[str],
+    max_age: float = USER_LOOKUP_CACHE_TTL
+) -> Optional[str]:
+    """
+    Look up the user ID for a Bearer token in the local cache only
+    
+    Args:
+        authorization: Bearer token from request header
+        max_age: Seconds a cached resolution may be reused
+        
+    Returns:
+        Cached user ID, or None if the token is not cached or has expired
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    entry = _user_lookup_cache.get(_token_digest(authorization.split(" ")[1]))
+    if entry is not None and time.monotonic() - entry[0] < max_age:
+        return entry[1]
+    return None
+
+
+def quota_known_to_allow(authorization: Optional[str] = None) -> bool:
+    """
+    Whether a search is already known to be allowed without asking Supabase
+    
+    True only in dev mode, or when the token resolved recently and that user's
+    last quota check (within USER_LOOKUP_CACHE_TTL) left more than one search.
+    Callers may start work before check_user_quota() returns when this is
+    True; everyone else (anonymous, unknown or nearly exhausted users) must
+    wait for the real check. check_user_quota() still runs either way.
+    
+    Args:
+        authorization: Bearer token from request header
+        
+    Returns:
+        True if the quota check is expected to pass
+    """
+    if not supabase:
+        return True
+    user_id = _cached_user_id(authorization)
+    if user_id is None:
+        return False
+    entry = _recent_quota.get(user_id)
+    return (
+        entry is not None
+        and time.monotonic() - entry[0] < USER_LOOKUP_CACHE_TTL
+        and entry[1] > 1
+    )
+
+
+def _remember_quota(user_id: str, quota_info: Dict[str, Any]) -> None:
+    """Record the outcome of a successful quota check for quota_known_to_allow()"""
+    if len(_recent_quota) >= USER_LOOKUP_CACHE_SIZE:
+        # Drop the oldest insertion to keep the cache bounded
+        _recent_quota.pop(next(iter(_recent_quota)))
+    _recent_quota[user_id] = (time.monotonic(), quota_info.get('searches_remaining') or 0)
+
+
 async def check_user_quota(authorization: Optional[str] = None) -> Dict[str, Any]:
     """
     Check if user has available search quota
@@ -66,16 +216,7 @@ async def check_user_quota(authorization: Optional[str] = None) -> Dict[str, Any
         }
     
     # Extract user from authorization token
-    user_id = None
-    if authorization and authorization.startswith("Bearer "):
-        token = authorization.split(" ")[1]
-        try:
-            # Verify JWT and get user
-            user_response = supabase.auth.get_user(token)
-            if user_response and hasattr(user_response, 'user'):
-                user_id = user_response.user.id
-        except Exception as e:
-            print(f"⚠️ Failed to verify user token: {e}")
+    user_id = await _get_user_id(authorization)
     
     # If no user (anonymous), allow limited searches
     if not user_id:
@@ -88,7 +229,9 @@ async def check_user_quota(authorization: Optional[str] = None) -> Dict[str, Any
     
     try:
         # Call database function to check quota
-        response = supabase.rpc('check_search_quota', {'p_user_id': user_id}).execute()
+        response = await _run_supabase(
+            lambda: supabase.rpc('check_search_quota', {'p_user_id': user_id}).execute()
+        )
         
         if response.data and len(response.data) > 0:
             quota_info = response.data[0]
@@ -108,6 +251,7 @@ async def check_user_quota(authorization: Optional[str] = None) -> Dict[str, Any
                     }
                 )
             
+            _remember_quota(user_id, quota_info)
             return quota_info
         else:
             # No subscription found, allow search (will be created on increment)
@@ -156,16 +300,9 @@ async def increment_user_search(
             "message": "Development mode"
         }
     
-    # Extract user from authorization token
-    user_id = None
-    if authorization and authorization.startswith("Bearer "):
-        token = authorization.split(" ")[1]
-        try:
-            user_response = supabase.auth.get_user(token)
-            if user_response and hasattr(user_response, 'user'):
-                user_id = user_response.user.id
-        except Exception as e:
-            print(f"⚠️ Failed to verify user token: {e}")
+    # Extract user from authorization token; the search was already authorized,
+    # so the resolution made by check_user_quota() may be reused for longer
+    user_id = await _get_user_id(authorization, USER_LOOKUP_REUSE_TTL)
     
     # If no user, skip increment
     if not user_id:
@@ -178,11 +315,11 @@ async def increment_user_search(
     
     try:
         # Call database function to increment count
-        response = supabase.rpc('increment_search_count', {
+        response = await _run_supabase(lambda: supabase.rpc('increment_search_count', {
             'p_user_id': user_id,
             'p_search_id': search_id,
             'p_query_preview': query_preview[:100] if query_preview else None
-        }).execute()
+        }).execute())
         
         if response.data and len(response.data) > 0:
             return response.data[0]
@@ -204,6 +341,28 @@ async def increment_user_search(
         }
 
 
+def build_quota_headers(searches_remaining: int, plan_type: str = "free", reset_date: str = "") -> Dict[str, str]:
+    """
+    Generate HTTP headers from quota values already in hand
+    
+    OPTIMIZED: Callers that hold the individual values pass them directly
+    instead of packing a quota dict just to have it unpacked here.
+    
+    Args:
+        searches_remaining: Searches left in the current period
+        plan_type: Subscription plan type
+        reset_date: Date the quota resets ("" if unknown)
+        
+    Returns:
+        Dict of HTTP headers
+    """
+    return {
+        "X-Search-Limit": str(searches_remaining),
+        "X-Plan-Type": plan_type,
+        "X-Reset-Date": reset_date,
+    }
+
+
 def get_quota_headers(quota_info: Dict[str, Any]) -> Dict[str, str]:
     """
     Generate HTTP headers with quota information
@@ -214,8 +373,8 @@ def get_quota_headers(quota_info: Dict[str, Any]) -> Dict[str, str]:
     Returns:
         Dict of HTTP headers
     """
-    return {
-        "X-Search-Limit": str(quota_info.get("searches_remaining", 0)),
-        "X-Plan-Type": quota_info.get("plan_type", "free"),
-        "X-Reset-Date": quota_info.get("reset_date", ""),
-    }
+    return build_quota_headers(
+        quota_info.get("searches_remaining", 0),
+        quota_info.get("plan_type", "free"),
+        quota_info.get("reset_date", "")
+    )
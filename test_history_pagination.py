@@ -0,0 +1,85 @@
+"""
+History Pagination Test Suite
+Tests the keyset cursor used by GET /history (no database or Supabase SDK needed)
+"""
+
+import os
+import sys
+import uuid
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from history_pagination import history_cursor, parse_history_cursor
+
+
+ROW = {
+    "id": "3f1c2a9e-8b7d-4c6e-9a5f-1e2d3c4b5a69",
+    "created_at": "2024-05-01T12:30:45.123456+00:00",
+}
+
+
+def assert_invalid(cursor: str):
+    """Assert that a cursor is rejected with ValueError"""
+    try:
+        parse_history_cursor(cursor)
+    except ValueError:
+        return
+    raise AssertionError(f"Cursor should have been rejected: {cursor!r}")
+
+
+def test_cursor_round_trip():
+    """A cursor decodes back to the row's typed created_at and id"""
+    cursor = history_cursor(ROW)
+    created_at, last_id = parse_history_cursor(cursor)
+
+    assert created_at == datetime(2024, 5, 1, 12, 30, 45, 123456, tzinfo=timezone.utc)
+    assert last_id == uuid.UUID(ROW["id"])
+    assert created_at.isoformat() == ROW["created_at"]
+
+
+def test_cursor_is_url_safe():
+    """Cursors need no escaping in a query string ('+' in offsets is encoded away)"""
+    cursor = history_cursor(ROW)
+
+    assert "+" not in cursor and "/" not in cursor and "=" not in cursor
+    assert ":" not in cursor and "|" not in cursor
+
+
+def test_malformed_cursors_rejected():
+    """Garbage, wrong shapes and bad parts raise ValueError (HTTP 400)"""
+    assert_invalid("not base64 at all!")
+    assert_invalid(ROW["created_at"] + ":" + ROW["id"])  # Old raw format
+    assert_invalid(history_cursor({"created_at": "yesterday", "id": ROW["id"]}))
+    assert_invalid(history_cursor({"created_at": ROW["created_at"], "id": "42"}))
+    assert_invalid("")
+
+
+def test_filter_injection_rejected():
+    """PostgREST filter syntax smuggled into a cursor part never parses"""
+    injected = {
+        "created_at": '2024-05-01T00:00:00",user_id.neq."00000000-0000-0000-0000-000000000000',
+        "id": ROW["id"],
+    }
+    assert_invalid(history_cursor(injected))
+
+    injected = {"created_at": ROW["created_at"], "id": ROW["id"] + '"),or(id.gt.0'}
+    assert_invalid(history_cursor(injected))
+
+
+def main():
+    """Run all tests"""
+    tests = [
+        test_cursor_round_trip,
+        test_cursor_is_url_safe,
+        test_malformed_cursors_rejected,
+        test_filter_injection_rejected,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"\n✅ All {len(tests)} history pagination tests passed")
+
+
+if __name__ == "__main__":
+    main()
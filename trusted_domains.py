@@ -160,6 +160,13 @@ class TrustedDomains:
         ]
     }
     
+    # OPTIMIZED: One precompiled alternation per category, so pattern detection is a
+    # single regex match per category instead of a re.search per pattern
+    _PATTERN_REGEXES = {
+        category: re.compile("|".join(patterns))
+        for category, patterns in DOMAIN_PATTERNS.items()
+    }
+    
     @classmethod
     @lru_cache(maxsize=500)  # Cache up to 500 domain lookups (30-40% faster)
     def get_domain_trust_info(cls, url: str) -> Dict[str, Any]:
@@ -183,7 +190,7 @@ class TrustedDomains:
                 
         Performance:
             - Cached using lru_cache for 30-40% faster repeated lookups
-            - Cache size: 500 unique domains
+            - Cache size: 500 unique URLs, backed by a 2048-entry per-domain cache
                 
         Examples:
             >>> TrustedDomains.get_domain_trust_info("https://stanford.edu/research")
@@ -195,8 +202,23 @@ class TrustedDomains:
             {'trust_flag': 'unverified', 'trust_score': 50, 'is_trusted': False,
              'category': 'Unverified Source', 'domain': 'example.com'}
         """
-        domain = cls._extract_domain(url)
+        return cls._domain_trust_info(cls._extract_domain(url))
+    
+    @classmethod
+    @lru_cache(maxsize=2048)
+    def _domain_trust_info(cls, domain: str) -> Dict[str, Any]:
+        """
+        Classify a bare domain into a trust category.
         
+        Cached per domain rather than per URL, so every page of a site shares one
+        classification.
+        
+        Args:
+            domain (str): Lowercase domain without the 'www.' prefix
+            
+        Returns:
+            Dict[str, Any]: Trust information (see get_domain_trust_info)
+        """
         # Check specific domains first
         for category, domains in [
             ('academic_research_trusted', cls.ACADEMIC_DOMAINS),
@@ -217,16 +239,15 @@ class TrustedDomains:
                 }
         
         # Check domain patterns
-        for category, patterns in cls.DOMAIN_PATTERNS.items():
-            for pattern in patterns:
-                if re.search(pattern, domain):
-                    return {
-                        'trust_flag': category,
-                        'trust_score': cls.TRUST_FLAGS[category],
-                        'is_trusted': True,
-                        'category': cls._get_category_name(category),
-                        'domain': domain
-                    }
+        for category, pattern in cls._PATTERN_REGEXES.items():
+            if pattern.search(domain):
+                return {
+                    'trust_flag': category,
+                    'trust_score': cls.TRUST_FLAGS[category],
+                    'is_trusted': True,
+                    'category': cls._get_category_name(category),
+                    'domain': domain
+                }
         
         # Not a trusted domain
         return {